@@ -1,8 +1,11 @@
 from flask import Flask
 from flask_cors import CORS
-from flask_mail import Mail, Message
-from core import config
+from flask_mail import Mail
+from core import config, lazy, log, metrics
 from core.database import db
+from core.outbox import start_outbox_worker
+from core.notifications import start_notification_flusher
+from core.slots import start_slot_archiver
 from routes.second_opinion import second_opinion_bp
 from routes.chat import chat_bp
 from routes.doctors import doctors_bp
@@ -12,42 +15,109 @@ from routes.doctor_dashboard import doctor_dashboard_bp
 from routes.slot_booking import slot_bp
 from routes.agora_routes import agora_bp
 from routes.final_report import final_report_bp
+from routes.uploads import uploads_bp
+from routes.notifications import notifications_bp
+from routes.health import health_bp
+from routes.metrics import metrics_bp
+from core.health import database_health
+from core.data_loader import get_doctor_catalogue
+from core.gemini_utils import get_term_cache
 import os
+import time
+import logging
 
 
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "http://localhost:5173"}})
-mail = Mail(app)
+logger = logging.getLogger(__name__)
+mail = Mail()
 
-app.config["MAIL_SERVER"] = "smtp.gmail.com"
-app.config["MAIL_PORT"] = 587
-app.config["MAIL_USE_TLS"] = True
-app.config["MAIL_USERNAME"] = "sameekshamenda19@gmail.com"
-app.config["MAIL_PASSWORD"] = "xjns tijl rcys rwod"
 
-# ✅ Database Configuration
-app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL")
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+def create_app():
+    """Build the Flask app. Cheap: no database connection, no datasets or
+    heavy SDKs (those load on first use, or up front via warmup())."""
+    app = Flask(__name__)
+    CORS(app, resources={r"/api/*": {"origins": "http://localhost:5173"}})
 
-# ✅ Initialize DB
-db.init_app(app)
+    app.config["MAIL_SERVER"] = "smtp.gmail.com"
+    app.config["MAIL_PORT"] = 587
+    app.config["MAIL_USE_TLS"] = True
+    app.config["MAIL_USERNAME"] = "sameekshamenda19@gmail.com"
+    app.config["MAIL_PASSWORD"] = "xjns tijl rcys rwod"
+    mail.init_app(app)
 
-# ✅ Register Blueprints
-app.register_blueprint(final_report_bp, url_prefix="/api")
-app.register_blueprint(agora_bp, url_prefix="/api")
-app.register_blueprint(doctor_dashboard_bp, url_prefix="/api")
-app.register_blueprint(slot_bp, url_prefix="/api")
-app.register_blueprint(auth_bp, url_prefix="/api/auth")
-app.register_blueprint(second_opinion_bp, url_prefix="/api")
-app.register_blueprint(chat_bp, url_prefix="/api")
-app.register_blueprint(doctors_bp, url_prefix="/api")
-app.register_blueprint(appointments_bp, url_prefix="/api")
+    # ✅ Database Configuration (pool settings from env, see core/config.py)
+    app.config["SQLALCHEMY_DATABASE_URI"] = config.DB_URI
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = config.engine_options(config.DB_URI)
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-@app.route("/")
-def home():
-    return "Next Opinion API is running 🚀"
+    # ✅ Initialize DB
+    db.init_app(app)
+
+    # ✅ Register Blueprints
+    app.register_blueprint(final_report_bp, url_prefix="/api")
+    app.register_blueprint(agora_bp, url_prefix="/api")
+    app.register_blueprint(doctor_dashboard_bp, url_prefix="/api")
+    app.register_blueprint(slot_bp, url_prefix="/api")
+    app.register_blueprint(auth_bp, url_prefix="/api/auth")
+    app.register_blueprint(second_opinion_bp, url_prefix="/api")
+    app.register_blueprint(uploads_bp, url_prefix="/api")
+    app.register_blueprint(chat_bp, url_prefix="/api")
+    app.register_blueprint(notifications_bp, url_prefix="/api")
+    app.register_blueprint(doctors_bp, url_prefix="/api")
+    app.register_blueprint(appointments_bp, url_prefix="/api")
+    app.register_blueprint(health_bp)
+    app.register_blueprint(metrics_bp)
+
+    # ✅ JSON logs via a background queue, tagged with request ids
+    log.init_app(app)
+
+    # ✅ Per-route latency / SQL / Gemini / SMTP histograms (GET /metrics)
+    metrics.init_app(app)
+
+    @app.route("/")
+    def home():
+        return "Next Opinion API is running 🚀"
+
+    return app
+
+
+def warmup(app):
+    """Load everything workers would otherwise each load on first request:
+    the heavy SDKs, the doctor DataFrame and matcher catalogue, the Gemini
+    term cache. Run it in the gunicorn master before fork (gunicorn.conf.py)
+    so the workers share these pages copy-on-write.
+
+    Only process-local, read-only state is built here. Anything that holds a
+    database connection (pool, availability table, slot indexes) stays
+    per-worker: a socket shared across fork would be used by two processes.
+    """
+    started = time.perf_counter()
+    failed = lazy.load_all()
+    for name, error in failed.items():
+        logger.warning("Warmup: %s not preloaded (%s)", name, error)
+
+    catalogue = get_doctor_catalogue()
+    term_cache = get_term_cache()
+
+    with app.app_context():
+        # Nothing above should have connected, but never fork with a live pool
+        db.engine.dispose()
+
+    logger.info("Warmup done in %.0f ms: %d doctors, %d cached terms",
+                (time.perf_counter() - started) * 1000, len(catalogue["doctors"]), len(term_cache))
+
+
+app = create_app()
 
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        health = database_health()
+        logger.info("Startup health: %s", health)
+        if health["ok"]:
+            db.create_all()
+    # Dev server runs background jobs in-process; in production run outbox_worker.py
+    # (only in the reloader child, otherwise both processes would run them)
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_outbox_worker(app)
+        start_notification_flusher(app)
+        start_slot_archiver(app)
     app.run(debug=True)
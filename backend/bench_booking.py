@@ -0,0 +1,122 @@
+# bench_booking.py
+# Concurrent booking stress test: many threads race for a small set of slots.
+#   python bench_booking.py                      → SQLite file stand-in
+#   DATABASE_URL=postgresql://... python bench_booking.py
+# Optional: THREADS, ATTEMPTS, SLOTS env vars; pass --naive to run the old
+# read-then-write booking for comparison.
+# Exits non-zero if any slot ends up with more than one appointment, or the
+# booked flags disagree with the appointments (so it can gate CI).
+import os
+import sys
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from flask import Flask
+from core.database import db
+from core.models import User, Doctor, Slot, Appointment
+from core.booking import claim_slot
+
+THREADS = int(os.getenv("THREADS", "16"))
+ATTEMPTS = int(os.getenv("ATTEMPTS", "50"))      # per thread
+SLOTS = int(os.getenv("SLOTS", "100"))
+NAIVE = "--naive" in sys.argv
+
+
+def make_app():
+    app = Flask(__name__)
+    uri = os.getenv("DATABASE_URL") or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    if uri.startswith("sqlite"):
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
+    db.init_app(app)
+    return app
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    patient = User(name="Bench Patient", email="bench-patient@example.com", password="x")
+    doc_user = User(name="Bench Doctor", email="bench-doctor@example.com", password="x", role="doctor")
+    db.session.add_all([patient, doc_user])
+    db.session.flush()
+    doctor = Doctor(user_id=doc_user.id, email=doc_user.email)
+    db.session.add(doctor)
+    db.session.flush()
+    base = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    db.session.add_all([
+        Slot(doctor_id=doctor.id, start=base + timedelta(minutes=30 * i),
+             end=base + timedelta(minutes=30 * (i + 1)))
+        for i in range(SLOTS)
+    ])
+    db.session.commit()
+    return patient.id, doctor.id, [s.id for s in Slot.query.all()]
+
+
+def book(slot_id, patient_id, doctor_id):
+    if NAIVE:
+        slot = Slot.query.get(slot_id)
+        if slot.is_booked:
+            return False
+        time.sleep(0)  # let other threads interleave, as real request handling would
+        slot.is_booked = True
+    elif not claim_slot(slot_id, doctor_id):
+        return False
+    db.session.add(Appointment(doctor_id=doctor_id, patient_id=patient_id, slot_id=slot_id))
+    db.session.commit()
+    return True
+
+
+def worker(app, patient_id, doctor_id, slot_ids, stats):
+    rng = random.Random()
+    for _ in range(ATTEMPTS):
+        with app.app_context():
+            try:
+                ok = book(rng.choice(slot_ids), patient_id, doctor_id)
+                stats["booked" if ok else "rejected"] += 1
+            except Exception:
+                db.session.rollback()
+                stats["errors"] += 1
+
+
+if __name__ == "__main__":
+    app = make_app()
+    with app.app_context():
+        patient_id, doctor_id, slot_ids = seed()
+
+    stats = Counter()
+    threads = [threading.Thread(target=worker, args=(app, patient_id, doctor_id, slot_ids, stats))
+               for _ in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        per_slot = Counter(a.slot_id for a in Appointment.query.all())
+        double_booked = sum(1 for n in per_slot.values() if n > 1)
+        booked_slots = Slot.query.filter_by(is_booked=True).count()
+
+    total = THREADS * ATTEMPTS
+    backend = app.config["SQLALCHEMY_DATABASE_URI"].split(":")[0]
+    print(f"mode: {'naive read-then-write' if NAIVE else 'conditional UPDATE'} on {backend}")
+    print(f"{total} attempts by {THREADS} threads in {elapsed:.2f}s → {total / elapsed:,.0f} attempts/s")
+    print(f"booked {stats['booked']}, rejected {stats['rejected']}, errors {stats['errors']}, "
+          f"success rate {stats['booked'] / SLOTS:.0%} of {SLOTS} slots")
+    print(f"slots marked booked: {booked_slots}, appointments: {sum(per_slot.values())}, "
+          f"double-booked slots: {double_booked}")
+
+    failures = []
+    if double_booked:
+        failures.append(f"{double_booked} slot(s) double-booked")
+    if booked_slots != len(per_slot):
+        failures.append(f"{booked_slots} slots marked booked but {len(per_slot)} have appointments")
+    if stats["booked"] != sum(per_slot.values()):
+        failures.append(f"{stats['booked']} bookings reported but {sum(per_slot.values())} appointments stored")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,74 @@
+# bench_compression.py
+# Row size + read latency of CompressedText vs plain TEXT.
+#   python bench_compression.py        → synthetic AI-analysis payloads
+#   python bench_compression.py --db   → real rows from ai_analyses / appointments
+import sys
+import json
+import time
+from core.compression import compress_text, decompress_text
+
+ROUNDS = 2000
+
+
+def sample_payload():
+    conditions = []
+    for i in range(5):
+        conditions.append({
+            "disease": f"Condition {i}",
+            "risk": f"{20 + i * 10}%",
+            "Doctor's Name": "Cardiologist",
+            "explanation": "Elevated LDL cholesterol and triglycerides with borderline "
+                           "HbA1c suggest metabolic syndrome; recommend lipid panel follow-up. " * 3,
+            "recommended_doctors": [{
+                "id": j, "name": f"Dr. Example {j}", "speciality": "Cardiologist",
+                "location": "Mumbai", "experience": 15, "rating": 4.7, "score": 0.71,
+                "email": f"doctor{j}@example.com", "phone": "+91 98765 43210",
+            } for j in range(3)],
+        })
+    return json.dumps({"conditions": conditions})
+
+
+def bench(label, values):
+    raw_bytes = sum(len(v.encode("utf-8")) for v in values)
+    packed = [compress_text(v) for v in values]
+    packed_bytes = sum(len(p) for p in packed)
+
+    start = time.perf_counter()
+    for _ in range(max(1, ROUNDS // len(values))):
+        for p in packed:
+            decompress_text(p)
+    reads = max(1, ROUNDS // len(values)) * len(values)
+    per_read_us = (time.perf_counter() - start) / reads * 1e6
+
+    print(f"{label}: {len(values)} values, avg {raw_bytes // len(values)} B → "
+          f"{packed_bytes // len(values)} B ({packed_bytes / raw_bytes:.0%}), "
+          f"decode {per_read_us:.1f} µs/value")
+
+
+def bench_db():
+    from sqlalchemy import text
+    from app import app
+    from core.database import db
+    from core.models import AIAnalysis
+
+    with app.app_context():
+        for table, column in (("ai_analyses", "full_analysis_json"), ("appointments", "ai_analysis")):
+            avg = db.session.execute(text(
+                f"SELECT avg(pg_column_size({column})), avg(octet_length({column})) FROM {table}"
+            )).one()
+            print(f"{table}.{column}: avg stored {avg[0]} B, avg octets {avg[1]} B")
+
+        start = time.perf_counter()
+        rows = AIAnalysis.query.limit(1000).all()
+        for r in rows:
+            json.loads(r.full_analysis_json)
+        elapsed = time.perf_counter() - start
+        if rows:
+            print(f"ORM read+parse: {len(rows)} rows in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    if "--db" in sys.argv:
+        bench_db()
+    else:
+        bench("ai_analysis JSON", [sample_payload() for _ in range(50)])
@@ -0,0 +1,67 @@
+# bench_slots.py
+# Time POST /doctor/<id>/slots/bulk for a year of slots for one doctor.
+#   python bench_slots.py                        → SQLite file stand-in
+#   DATABASE_URL=postgresql://... python bench_slots.py
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from flask import Flask
+from core.database import db
+from core.models import User, Doctor, Slot
+from routes.doctor_dashboard import doctor_dashboard_bp
+
+
+def make_app():
+    app = Flask(__name__)
+    uri = os.getenv("DATABASE_URL") or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    db.init_app(app)
+    app.register_blueprint(doctor_dashboard_bp, url_prefix="/api")
+    return app
+
+
+def timed_post(client, url, payload):
+    start = time.perf_counter()
+    res = client.post(url, json=payload)
+    return res, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    app = make_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(name="Bench Doctor", email="bench-doctor@example.com", password="x", role="doctor")
+        db.session.add(user)
+        db.session.flush()
+        doctor = Doctor(user_id=user.id, email=user.email)
+        db.session.add(doctor)
+        db.session.commit()
+        doctor_id = doctor.id
+
+    first = date.today() + timedelta(days=1)
+    rule = {
+        "from_date": first.isoformat(),
+        "to_date": (first + timedelta(days=364)).isoformat(),
+        "weekdays": ["mon", "tue", "wed", "thu", "fri", "sat"],
+        "start_time": "09:00",
+        "end_time": "17:00",
+        "slot_minutes": 15,
+        "breaks": [["13:00", "14:00"]],
+    }
+    client = app.test_client()
+    url = f"/api/doctor/{doctor_id}/slots/bulk"
+
+    res, elapsed = timed_post(client, url, rule)
+    print(f"year of 15-min slots: {res.json} in {elapsed * 1000:.0f} ms")
+
+    # Same rule again: every generated slot overlaps an existing one
+    res, elapsed = timed_post(client, url, rule)
+    print(f"re-run (all overlapping): {res.json} in {elapsed * 1000:.0f} ms")
+
+    res, elapsed = timed_post(client, url, dict(rule, on_conflict="reject"))
+    print(f"re-run with on_conflict=reject: HTTP {res.status_code} in {elapsed * 1000:.0f} ms")
+
+    with app.app_context():
+        print(f"slots in table: {Slot.query.filter_by(doctor_id=doctor_id).count()}")
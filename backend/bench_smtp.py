@@ -0,0 +1,104 @@
+# bench_smtp.py
+# Throughput of the pooled SMTP sender against a local aiosmtpd stand-in,
+# plus correctness checks: every message delivered, the pooled paths reuse
+# one session, and a 421 reply retires the session and resends on a new one.
+#   pip install aiosmtpd && python bench_smtp.py [messages]
+# Exits non-zero if a check fails.
+import os
+import sys
+import time
+import smtplib
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+PORT = 8025
+
+# Point core.email_service at the local server before importing it
+os.environ.update({
+    "SMTP_SERVER": "127.0.0.1",
+    "SMTP_PORT": str(PORT),
+    "SMTP_USE_TLS": "0",
+    "SMTP_AUTH": "0",
+    "MAIL_USERNAME": "bench@nextopinion.local",
+    "MAIL_PASSWORD": "unused",
+})
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from core import email_service  # noqa: E402
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+        self.fail_next = 0     # answer this many DATA commands with 421
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_next:
+            self.fail_next -= 1
+            return "421 Service closing transmission channel"
+        self.received += 1
+        return "250 OK"
+
+
+def message(i):
+    return {"to": f"patient{i}@example.com", "subject": f"Bench {i}", "body": "Hello " * 50}
+
+
+def report(label, elapsed):
+    print(f"{label:<28} {N} msgs in {elapsed:.2f}s → {N / elapsed:,.0f} msg/s")
+
+
+failures = []
+
+
+def check(ok, label):
+    print(f"{'ok  ' if ok else 'FAIL'} {label}")
+    if not ok:
+        failures.append(label)
+
+
+if __name__ == "__main__":
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=PORT)
+    controller.start()
+    try:
+        # Old behaviour: one connection (+ handshake) per email
+        start = time.perf_counter()
+        for i in range(N):
+            m = message(i)
+            server = smtplib.SMTP("127.0.0.1", PORT)
+            msg = email_service.build_message(m["to"], m["subject"], m["body"])
+            server.sendmail(email_service.EMAIL_ADDRESS, m["to"], msg.as_string())
+            server.quit()
+        report("connection per email", time.perf_counter() - start)
+        check(handler.received == N, f"connection per email delivered {handler.received}/{N}")
+
+        pool = email_service.smtp_pool
+        handler.received = 0
+        start = time.perf_counter()
+        sent = sum(email_service.send_email(m["to"], m["subject"], m["body"])
+                   for m in map(message, range(N)))
+        report("pooled send_email", time.perf_counter() - start)
+        check(sent == N and handler.received == N, f"pooled send_email delivered {handler.received}/{N}")
+        check(pool.stats["opened"] == 1 and pool.stats["reused"] == N - 1,
+              f"pooled send_email used one session ({pool.stats})")
+
+        handler.received = 0
+        start = time.perf_counter()
+        errors = email_service.send_batch([message(i) for i in range(N)])
+        report("send_batch (one session)", time.perf_counter() - start)
+        check(errors == [None] * N and handler.received == N, f"send_batch delivered {handler.received}/{N}")
+        check(pool.stats["opened"] == 1, f"send_batch reused the pooled session ({pool.stats})")
+
+        # 421 mid-batch: that session is discarded, the rest go out on a new one
+        handler.received = 0
+        handler.fail_next = 1
+        errors = email_service.send_batch([message(i) for i in range(10)])
+        check(errors == [None] * 10 and handler.received == 10,
+              f"batch with a 421 delivered {handler.received}/10")
+        check(pool.stats["opened"] == 2 and pool.stats["discarded"] == 1,
+              f"421 session discarded and replaced ({pool.stats})")
+    finally:
+        email_service.smtp_pool.close_all()
+        controller.stop()
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,114 @@
+# check_explain.py
+# Runs the main read routes through the test client, captures every SELECT they
+# issue, and EXPLAINs each one against DATABASE_URL. Flags sequential scans:
+#   Postgres: plans are taken with enable_seqscan = off, so a "Seq Scan" that
+#             survives means no usable index exists (tiny tables can't hide it)
+#   SQLite:   "SCAN <table>" without an index in EXPLAIN QUERY PLAN
+# Needs some data (ids are picked from the existing rows). Exits 1 on findings.
+#   python check_explain.py
+import sys
+import json
+from sqlalchemy import event
+from core.database import db
+from core.models import Appointment, Doctor, Notification, UserReport
+
+
+def first_id(column):
+    return db.session.execute(db.select(column).where(column.isnot(None)).limit(1)).scalar() or 1
+
+
+def route_urls():
+    doctor_id = first_id(Appointment.doctor_id)
+    patient_id = first_id(Appointment.patient_id)
+    doctor_user_id = first_id(Doctor.user_id)
+    notified_user = first_id(Notification.user_id)
+    report_user = first_id(UserReport.user_id)
+    report_id = first_id(UserReport.id)
+    return [
+        f"/api/doctor/{doctor_id}/appointments",
+        f"/api/patient/{patient_id}/appointments",
+        f"/api/doctor/{doctor_id}/slots",
+        f"/api/doctor/{doctor_id}/slots/next_free",
+        f"/api/doctors/availability?ids={doctor_id}",
+        f"/api/doctors/{doctor_user_id}",
+        f"/api/notifications/{notified_user}",
+        f"/api/notifications/{notified_user}/unread_count",
+        f"/api/second_opinion/reports?user_id={report_user}",
+        f"/api/second_opinion/{report_id}",
+        f"/api/chat/{report_id}",
+    ]
+
+
+def seq_scans_postgres(conn, statement, parameters):
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    found, stack = [], [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if node.get("Node Type") == "Seq Scan":
+            found.append(node.get("Relation Name"))
+        stack.extend(node.get("Plans", []))
+    return found
+
+
+def seq_scans_sqlite(conn, statement, parameters):
+    cursor = conn.connection.cursor()
+    try:
+        rows = cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    finally:
+        cursor.close()
+    # "SCAN <table>" without an index; scans of subqueries / CTEs are fine
+    return [
+        detail.split()[1] for *_, detail in rows
+        if detail.startswith("SCAN ") and "INDEX" not in detail
+        and detail.split()[1] in db.metadata.tables
+    ]
+
+
+def main(app):
+    captured = []
+
+    with app.app_context():
+        engine = db.engine
+        urls = route_urls()
+        explain = seq_scans_postgres if engine.dialect.name == "postgresql" else seq_scans_sqlite
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and not executemany:
+                captured.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+
+    client = app.test_client()
+    problems = 0
+    for url in urls:
+        captured.clear()
+        status = client.get(url).status_code
+        statements = list(captured)
+
+        with app.app_context():
+            with db.engine.connect() as conn:
+                for statement, parameters in statements:
+                    tables = explain(conn, statement, parameters)
+                    conn.rollback()
+                    if tables:
+                        problems += 1
+                        print(f"SEQ SCAN {url} on {', '.join(sorted(set(tables)))}")
+                        print("         " + " ".join(statement.split())[:200])
+        print(f"checked  {url} (HTTP {status}, {len(statements)} statements)")
+
+    print(f"\n{'❌' if problems else '✅'} {problems} statements with sequential scans")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    from app import app
+    sys.exit(main(app))
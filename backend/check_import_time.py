@@ -0,0 +1,69 @@
+# check_import_time.py
+# Import-time budget for `import app`, measured with `python -X importtime` in a
+# fresh interpreter. Fails if a heavy dependency is imported eagerly again or
+# the total exceeds IMPORT_BUDGET_MS (default 1500).
+#   python check_import_time.py [--top N]
+import os
+import re
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+# Must only load on first use (see core/lazy.py, core/data_loader.py)
+DEFERRED = [
+    "pandas", "fitz", "PIL", "pytesseract", "google.generativeai",
+    "fpdf", "agora_token_builder",
+]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure():
+    env = dict(os.environ)
+    # Never depend on a reachable database for this check
+    env.setdefault("DATABASE_URL", "sqlite://")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        sys.exit(f"❌ import app failed (exit {result.returncode})")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+if __name__ == "__main__":
+    top = int(sys.argv[sys.argv.index("--top") + 1]) if "--top" in sys.argv else 10
+    modules = measure()
+
+    total_ms = next(us for name, us, _ in modules if name == "app") / 1000
+    eager = sorted({
+        heavy for name, _, _ in modules for heavy in DEFERRED
+        if name == heavy or name.startswith(heavy + ".")
+    })
+
+    print(f"import app: {total_ms:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    print("slowest top-level imports:")
+    direct = sorted((m for m in modules if m[2] <= 1 and m[0] != "app"), key=lambda m: -m[1])
+    for name, us, _ in direct[:top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if eager:
+        failed = True
+        print(f"❌ imported at startup, should be lazy: {', '.join(eager)}")
+    if total_ms > IMPORT_BUDGET_MS:
+        failed = True
+        print(f"❌ over budget by {total_ms - IMPORT_BUDGET_MS:.0f} ms")
+    if not failed:
+        print("✅ within budget, heavy dependencies deferred")
+    sys.exit(1 if failed else 0)
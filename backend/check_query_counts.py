@@ -0,0 +1,74 @@
+# check_query_counts.py
+# Regression check: the appointment list endpoints must issue a fixed number
+# of SQL statements per page, whatever the page size (no N+1 lazy loads).
+#   python check_query_counts.py                 → SQLite in memory
+#   DATABASE_URL=postgresql://... python check_query_counts.py   (use a scratch DB)
+# Exits non-zero if any page size needs a different number of statements.
+import os
+import sys
+import json
+from flask import Flask
+from sqlalchemy import event
+from core.database import db
+from core.models import User, Doctor, Slot, Appointment
+from routes.appointments import appointments_bp
+from routes.doctor_dashboard import doctor_dashboard_bp
+
+APPOINTMENTS = 300
+PAGE_SIZES = [1, 10, 50, 200]
+# version-counter lookup for the ETag (core.versions) + the page itself
+EXPECTED_STATEMENTS = 2
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite://")
+    db.init_app(app)
+    app.register_blueprint(doctor_dashboard_bp, url_prefix="/api")
+    app.register_blueprint(appointments_bp, url_prefix="/api")
+    return app
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    patient = User(name="Check Patient", email="check-patient@example.com", password="x")
+    doc_user = User(name="Check Doctor", email="check-doctor@example.com", password="x", role="doctor")
+    db.session.add_all([patient, doc_user])
+    db.session.flush()
+    doctor = Doctor(user_id=doc_user.id, email=doc_user.email)
+    db.session.add(doctor)
+    db.session.flush()
+    for i in range(APPOINTMENTS):
+        slot = Slot(doctor_id=doctor.id, is_booked=True)
+        db.session.add(slot)
+        db.session.flush()
+        db.session.add(Appointment(
+            doctor_id=doctor.id, patient_id=patient.id, slot_id=slot.id,
+            disease=f"Condition {i}", ai_analysis=json.dumps([{"disease": "x"}]),
+            report_files=json.dumps(["a.pdf"]), report_names=json.dumps(["a.pdf"])
+        ))
+    db.session.commit()
+    return patient.id, doctor.id
+
+
+if __name__ == "__main__":
+    app = make_app()
+    with app.app_context():
+        patient_id, doctor_id = seed()
+        statements = []
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda conn, cursor, sql, *args: statements.append(sql))
+
+    client = app.test_client()
+    failed = False
+    for url in (f"/api/patient/{patient_id}/appointments", f"/api/doctor/{doctor_id}/appointments"):
+        for size in PAGE_SIZES:
+            statements.clear()
+            res = client.get(f"{url}?limit={size}")
+            rows = len(res.json["appointments"])
+            ok = res.status_code == 200 and rows == size and len(statements) == EXPECTED_STATEMENTS
+            failed |= not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {url} limit={size}: {rows} rows, {len(statements)} statements")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from datetime import timedelta
+from core.database import db
+from core.models import Doctor, Slot
+from core.slots import utcnow, as_aware
+
+# How far ahead free slots count towards a doctor's availability
+AVAILABILITY_HORIZON_DAYS = int(os.getenv("AVAILABILITY_HORIZON_DAYS", "14"))
+# Free slots in the horizon that count as "fully available"
+AVAILABILITY_TARGET_SLOTS = int(os.getenv("AVAILABILITY_TARGET_SLOTS", "10"))
+AVAILABILITY_REFRESH_SECONDS = int(os.getenv("AVAILABILITY_REFRESH_SECONDS", "60"))
+
+_table = {"loaded_at": None, "doctors": {}, "by_email": {}}
+_lock = threading.Lock()
+
+
+def refresh_availability():
+    """Rebuild the table with two queries: doctor ids by email, and one
+    GROUP BY over the free slots in the horizon."""
+    now = utcnow()
+    by_email = {
+        (email or "").strip().lower(): (doctor_id, user_id)
+        for doctor_id, user_id, email in db.session.execute(
+            db.select(Doctor.id, Doctor.user_id, Doctor.email)
+        ).all()
+    }
+    doctors = {
+        doctor_id: {"free_slots": free, "earliest": as_aware(earliest)}
+        for doctor_id, free, earliest in db.session.execute(
+            db.select(Slot.doctor_id, db.func.count(Slot.id), db.func.min(Slot.start))
+            .where(
+                Slot.is_booked.is_(False),
+                Slot.start >= now,
+                Slot.start < now + timedelta(days=AVAILABILITY_HORIZON_DAYS)
+            )
+            .group_by(Slot.doctor_id)
+        ).all()
+    }
+    with _lock:
+        _table.update(loaded_at=time.monotonic(), doctors=doctors, by_email=by_email)
+    return len(doctors)
+
+
+def _current():
+    loaded_at = _table["loaded_at"]
+    if loaded_at is None or time.monotonic() - loaded_at > AVAILABILITY_REFRESH_SECONDS:
+        refresh_availability()
+    return _table
+
+
+def lookup_doctor(email):
+    """(doctor_id, user_id) for a dataset email, or (None, None)."""
+    return _current()["by_email"].get((email or "").strip().lower(), (None, None))
+
+
+def availability_for(doctor_id):
+    """Free-slot count in the horizon, earliest free start, and a 0..1 score.
+
+    The score is half "how many free slots" and half "how soon is the first",
+    both against AVAILABILITY_HORIZON_DAYS.
+    """
+    entry = _current()["doctors"].get(doctor_id)
+    if not entry:
+        return {"free_slots": 0, "earliest_slot": None, "score": 0.0}
+
+    horizon = timedelta(days=AVAILABILITY_HORIZON_DAYS)
+    wait = max(entry["earliest"] - utcnow(), timedelta(0))
+    score = (
+        0.5 * min(entry["free_slots"] / AVAILABILITY_TARGET_SLOTS, 1.0)
+        + 0.5 * max(0.0, 1 - wait / horizon)
+    )
+    return {
+        "free_slots": entry["free_slots"],
+        "earliest_slot": entry["earliest"].isoformat(),
+        "score": score,
+    }
@@ -0,0 +1,43 @@
+from core.database import db
+from core.models import Slot
+from core.slot_index import index_booked
+from core.versions import bump, doctor_slots_key
+
+
+def claim_slot(slot_id, doctor_id):
+    """Mark a free slot of `doctor_id` as booked in one conditional UPDATE.
+
+    Returns True only for the transaction that flipped is_booked from False
+    to True. Concurrent callers block on the row lock and then see zero rows
+    updated, so a slot can never be handed out twice. The caller commits
+    (together with the appointment insert) or rolls back; the doctor's slot
+    index is updated only once that commit lands. A slot that belongs to
+    another doctor is never claimed.
+    """
+    if slot_id is None:
+        return False
+    claimed = db.session.execute(
+        db.update(Slot)
+        .where(Slot.id == slot_id, Slot.doctor_id == doctor_id, Slot.is_booked.is_(False))
+        .values(is_booked=True)
+        .returning(Slot.doctor_id, Slot.start)
+    ).first()
+    if claimed is None:
+        return False
+    index_booked(claimed.doctor_id, slot_id, claimed.start, True)
+    bump(doctor_slots_key(claimed.doctor_id))
+    return True
+
+
+def release_slot(slot_id):
+    if slot_id is None:
+        return
+    released = db.session.execute(
+        db.update(Slot)
+        .where(Slot.id == slot_id)
+        .values(is_booked=False)
+        .returning(Slot.doctor_id, Slot.start)
+    ).first()
+    if released is not None:
+        index_booked(released.doctor_id, slot_id, released.start, False)
+        bump(doctor_slots_key(released.doctor_id))
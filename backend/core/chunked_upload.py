@@ -0,0 +1,313 @@
+import os
+import json
+import uuid
+import time
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from core.upload_store import UPLOAD_DIR, upload_path
+from core.extract_text import extract_text_from_path
+
+try:
+    import fcntl
+except ImportError:     # Windows dev machines: the per-process lock still applies
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+# Chunks are written straight into a ".part" file at their offset, so a
+# worker never holds more than one IO buffer of an upload. Offsets may not
+# skip ahead of what was received, so the file only grows as data arrives.
+CHUNK_DIR = os.path.join(UPLOAD_DIR, "chunked")
+os.makedirs(CHUNK_DIR, exist_ok=True)
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+IO_BUFFER_SIZE = 64 * 1024
+
+# Uploads (finished or abandoned) are deleted this long after their last chunk
+CHUNK_UPLOAD_TTL = int(os.getenv("CHUNK_UPLOAD_TTL", str(24 * 3600)))
+CHUNK_SWEEP_INTERVAL = int(os.getenv("CHUNK_SWEEP_INTERVAL", "600"))
+# An extraction whose owner can't be confirmed alive is re-run after this long
+EXTRACTION_LEASE_SECONDS = int(os.getenv("EXTRACTION_LEASE_SECONDS", "300"))
+
+_extractor = ThreadPoolExecutor(max_workers=int(os.getenv("EXTRACT_WORKERS", "2")),
+                                thread_name_prefix="upload-extract")
+_jobs = {}
+_jobs_lock = threading.Lock()
+_meta_locks = threading.Lock()   # only used without fcntl
+_last_sweep = 0.0
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _meta_path(upload_id):
+    return os.path.join(CHUNK_DIR, f"{upload_id}.json")
+
+
+def _part_path(upload_id):
+    return os.path.join(CHUNK_DIR, f"{upload_id}.part")
+
+
+def _result_path(upload_id):
+    return os.path.join(CHUNK_DIR, f"{upload_id}.result.json")
+
+
+def _lock_path(upload_id):
+    return os.path.join(CHUNK_DIR, f"{upload_id}.lock")
+
+
+@contextmanager
+def _upload_lock(upload_id):
+    """Serialise meta read-modify-writes for one upload across threads and
+    (with fcntl) across worker processes."""
+    if fcntl is None:
+        with _meta_locks:
+            yield
+        return
+    with open(_lock_path(upload_id), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _save_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def get_upload(upload_id):
+    # upload ids are generated by us; refuse anything that could escape CHUNK_DIR
+    if not upload_id or not upload_id.isalnum():
+        raise UploadError("Invalid upload id", 404)
+    try:
+        with open(_meta_path(upload_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise UploadError("Upload not found", 404)
+
+
+def init_upload(filename, size):
+    filename = os.path.basename(filename or "").lower()
+    if not filename:
+        raise UploadError("filename is required")
+    if size <= 0 or size > MAX_UPLOAD_BYTES:
+        raise UploadError(f"size must be between 1 and {MAX_UPLOAD_BYTES} bytes")
+
+    _maybe_sweep()
+
+    upload_id = uuid.uuid4().hex
+    # Not preallocated: an abandoned upload only holds what was actually sent
+    open(_part_path(upload_id), "wb").close()
+
+    meta = {
+        "id": upload_id,
+        "filename": filename,
+        "size": size,
+        "received": 0,
+        "status": "uploading",
+        "created_at": time.time(),
+        "updated_at": time.time(),
+    }
+    _save_json(_meta_path(upload_id), meta)
+    return meta
+
+
+def write_chunk(upload_id, offset, stream, length):
+    """Copy `length` bytes from `stream` into the upload at `offset`.
+
+    Chunks may be re-sent (resume after a dropped connection) but must not
+    leave a gap, so `offset` can be at most the number of bytes received.
+    """
+    meta = get_upload(upload_id)
+    if meta["status"] != "uploading":
+        raise UploadError("Upload already finalized", 409)
+    if offset < 0 or offset > meta["received"]:
+        raise UploadError(f"Expected offset <= {meta['received']}", 409)
+    if length is None or offset + length > meta["size"]:
+        raise UploadError("Chunk exceeds declared upload size")
+
+    written = 0
+    with open(_part_path(upload_id), "r+b") as f:
+        f.seek(offset)
+        while written < length:
+            buf = stream.read(min(IO_BUFFER_SIZE, length - written))
+            if not buf:
+                break
+            f.write(buf)
+            written += len(buf)
+
+    # Re-read under the lock: concurrent chunks must not undo each other
+    with _upload_lock(upload_id):
+        meta = get_upload(upload_id)
+        meta["received"] = max(meta["received"], offset + written)
+        meta["updated_at"] = time.time()
+        _save_json(_meta_path(upload_id), meta)
+    return meta
+
+
+def _run_extraction(upload_id, path, filename):
+    result = {
+        "text": extract_text_from_path(path, filename),
+        "file_path": path,
+        "filename": filename,
+    }
+    _save_json(_result_path(upload_id), result)
+    return result
+
+
+def _start_extraction(upload_id, meta):
+    """Submit extraction here and record this process as its owner. Call with
+    the upload lock held."""
+    meta["extraction"] = {"host": socket.gethostname(), "pid": os.getpid(), "started_at": time.time()}
+    _save_json(_meta_path(upload_id), meta)
+    job = _extractor.submit(_run_extraction, upload_id, meta["file_path"], meta["filename"])
+    with _jobs_lock:
+        _jobs[upload_id] = job
+    # Forget it once done; the result file is written before it completes
+    job.add_done_callback(lambda _: _forget_job(upload_id, job))
+
+
+def _forget_job(upload_id, job):
+    with _jobs_lock:
+        if _jobs.get(upload_id) is job:
+            del _jobs[upload_id]
+
+
+def _owner_alive(meta):
+    owner = meta.get("extraction") or {}
+    if owner.get("host") == socket.gethostname():
+        if owner.get("pid") == os.getpid():
+            # ours but no longer in _jobs and no result: it failed
+            return False
+        try:
+            os.kill(owner["pid"], 0)
+            return True
+        except (OSError, KeyError, TypeError):
+            return False
+    # Another host: trust it until the lease runs out
+    return time.time() - owner.get("started_at", 0) < EXTRACTION_LEASE_SECONDS
+
+
+def finalize_upload(upload_id):
+    """Move the assembled file into the upload store and start extraction."""
+    with _upload_lock(upload_id):
+        meta = get_upload(upload_id)
+        if meta["status"] == "uploading":
+            if meta["received"] != meta["size"]:
+                raise UploadError(f"Upload incomplete ({meta['received']}/{meta['size']} bytes)", 409)
+
+            path = upload_path(f"{upload_id}_{meta['filename']}")
+            os.replace(_part_path(upload_id), path)
+
+            meta["status"] = "finalized"
+            meta["file_path"] = path
+            meta["updated_at"] = time.time()
+            _start_extraction(upload_id, meta)
+    return meta
+
+
+def get_extraction(upload_id, timeout=120):
+    """Return the extraction result of a finalized upload, waiting if it is
+    still running. If the process that started it is gone (worker restart,
+    crash) and left no result, extraction is re-run here."""
+    meta = get_upload(upload_id)
+    if meta["status"] != "finalized":
+        raise UploadError("Upload not finalized", 409)
+
+    deadline = time.time() + timeout
+    while True:
+        with _jobs_lock:
+            job = _jobs.get(upload_id)
+        if job is not None:
+            return job.result(timeout=max(deadline - time.time(), 0))
+
+        try:
+            with open(_result_path(upload_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+
+        with _upload_lock(upload_id):
+            meta = get_upload(upload_id)
+            if not os.path.exists(_result_path(upload_id)) and not _owner_alive(meta):
+                log.warning("Re-running extraction for upload %s (owner gone)", upload_id)
+                _start_extraction(upload_id, meta)
+                continue
+
+        if time.time() > deadline:
+            raise UploadError("Extraction still running", 504)
+        time.sleep(0.2)
+
+
+# -----------------------------
+# 🧹 Expiry
+# -----------------------------
+def sweep_expired_uploads(now=None):
+    """Delete the chunk-dir files (meta, .part, result, lock) of uploads whose
+    last activity is older than CHUNK_UPLOAD_TTL. Returns how many went."""
+    now = now or time.time()
+    removed = 0
+    for name in os.listdir(CHUNK_DIR):
+        if not name.endswith(".json") or name.endswith(".result.json"):
+            continue
+        upload_id = name[:-len(".json")]
+        try:
+            with open(_meta_path(upload_id)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            # half-written / unreadable meta: fall back to the file's mtime
+            try:
+                meta = {"updated_at": os.path.getmtime(_meta_path(upload_id))}
+            except OSError:
+                continue
+        if now - meta.get("updated_at", meta.get("created_at", 0)) < CHUNK_UPLOAD_TTL:
+            continue
+
+        # The assembled file (meta["file_path"]) stays: appointments attach it
+        for path in (_part_path(upload_id), _result_path(upload_id),
+                     _meta_path(upload_id), _lock_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        removed += 1
+
+    # orphaned .part files without meta (crash between the two writes)
+    for name in os.listdir(CHUNK_DIR):
+        if name.endswith(".part"):
+            path = os.path.join(CHUNK_DIR, name)
+            try:
+                if now - os.path.getmtime(path) > CHUNK_UPLOAD_TTL and \
+                        not os.path.exists(_meta_path(name[:-len(".part")])):
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+
+    if removed:
+        log.info("Swept %d expired chunked uploads", removed)
+    return removed
+
+
+def _maybe_sweep():
+    # Piggybacks on new uploads, at most once per CHUNK_SWEEP_INTERVAL per process
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < CHUNK_SWEEP_INTERVAL:
+        return
+    _last_sweep = now
+    try:
+        sweep_expired_uploads(now)
+    except OSError as e:
+        log.warning("Chunked upload sweep failed: %s", e)
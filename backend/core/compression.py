@@ -0,0 +1,79 @@
+import os
+import zlib
+from sqlalchemy.types import TypeDecorator, LargeBinary
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is always available
+    zstandard = None
+
+# First byte of every stored value says how the rest is encoded,
+# so the codec can change later without rewriting old rows.
+CODEC_RAW = 0    # plain UTF-8 (tiny values, rows migrated from TEXT columns)
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# Values shorter than this are not worth compressing
+MIN_COMPRESS_BYTES = 64
+
+COMPRESSION_CODEC = os.getenv("COMPRESSION_CODEC", "zlib").lower()
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+
+_zstd_compressor = None
+_zstd_decompressor = None
+
+
+def _zstd():
+    global _zstd_compressor, _zstd_decompressor
+    if zstandard is None:
+        raise RuntimeError("zstandard is not installed but a zstd-compressed value was found")
+    if _zstd_compressor is None:
+        _zstd_compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+        _zstd_decompressor = zstandard.ZstdDecompressor()
+    return _zstd_compressor, _zstd_decompressor
+
+
+def compress_text(value, codec=None):
+    raw = value.encode("utf-8")
+    if len(raw) < MIN_COMPRESS_BYTES:
+        return bytes([CODEC_RAW]) + raw
+
+    codec = codec or COMPRESSION_CODEC
+    if codec == "zstd" and zstandard is not None:
+        packed = bytes([CODEC_ZSTD]) + _zstd()[0].compress(raw)
+    else:
+        packed = bytes([CODEC_ZLIB]) + zlib.compress(raw, COMPRESSION_LEVEL)
+
+    # Incompressible input: keep it raw rather than store something bigger
+    if len(packed) >= len(raw) + 1:
+        return bytes([CODEC_RAW]) + raw
+    return packed
+
+
+def decompress_text(blob):
+    blob = bytes(blob)
+    codec, payload = blob[0], blob[1:]
+    if codec == CODEC_RAW:
+        return payload.decode("utf-8")
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if codec == CODEC_ZSTD:
+        return _zstd()[1].decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown compression codec byte: {codec}")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored compressed; reads/writes plain `str` transparently."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
@@ -1,22 +1,43 @@
 import os
-import psycopg2
 from dotenv import load_dotenv
-import google.generativeai as genai
+from core.lazy import lazy_module
 
 load_dotenv()
 
 # ✅ Gemini Configuration
-genai.configure(api_key=os.getenv("Model"))
+# The SDK takes ~1s to import; it is loaded (and configured) on first use
+genai = lazy_module("google.generativeai", setup=lambda m: m.configure(api_key=os.getenv("Model")))
 
 # ✅ Database Configuration
+# Nothing connects here: the engine opens connections lazily on first use,
+# so importing the app never waits on (or crashes because of) the database.
 DB_URI = os.getenv("DATABASE_URL")
 
-print("✅ Database URI Loaded:", DB_URI is not None)
-print("🔑 NextOpinion model is loaded:", bool(os.getenv("Model")))
+# requirements install psycopg2; newer SQLAlchemy defaults plain postgresql:// to psycopg 3
+if DB_URI and DB_URI.split("://", 1)[0] in ("postgres", "postgresql"):
+    DB_URI = "postgresql+psycopg2://" + DB_URI.split("://", 1)[1]
 
-conn = psycopg2.connect(os.getenv("DATABASE_URL"))
-cur = conn.cursor()
-cur.execute("SELECT version();")
-print(cur.fetchone())
-cur.close()
-conn.close()
+# Connection pool (per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))          # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))        # seconds; below server/proxy idle limits
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"       # drop dead connections before use
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))  # 0 = no limit (Postgres)
+
+
+def engine_options(uri=DB_URI):
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri`. SQLite keeps SQLAlchemy's defaults."""
+    if not uri or uri.startswith("sqlite"):
+        return {}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if uri.startswith("postgres") and DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
@@ -0,0 +1,155 @@
+import json
+from datetime import datetime
+from urllib.parse import quote
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from core.database import db
+from core.models import Appointment, Doctor, DoctorDashboardRow, Slot, User
+from core.slots import iso
+from core.versions import bump_versions, doctor_appts_key, patient_appts_key
+
+# The doctor dashboard reads pre-serialized rows from doctor_dashboard_rows
+# instead of parsing ai_analysis / report_files / report_names per request.
+# Rows are rebuilt inside the same transaction whenever a flush touches an
+# appointment (or the start / end of its slot, or its patient's name), so
+# they commit or roll back together with the change itself. Existing rows
+# are backfilled by migration 0004 (rebuild_dashboard.py repairs by hand).
+
+
+def _load_json_list(value):
+    try:
+        return json.loads(value) if value else []
+    except ValueError:
+        return []
+
+
+def build_payload(row):
+    file_paths = _load_json_list(row.report_files)
+    file_names = _load_json_list(row.report_names)
+
+    return json.dumps({
+        "id": row.id,
+        "patient_name": row.patient_name or "Unknown",
+        "disease": row.disease,
+        "slot_start": iso(row.slot_start),
+        "slot_end": iso(row.slot_end),
+        "status": row.status,
+        "video_channel": row.video_channel,
+        "ai_analysis": _load_json_list(row.ai_analysis),
+        "reports": [
+            {"name": n, "path": p, "download_url": f"/api/reports/download?path={quote(p)}"}
+            for p, n in zip(file_paths, file_names)
+        ]
+    })
+
+
+def _source_rows(conn, condition):
+    return conn.execute(
+        db.select(
+            Appointment.id, Appointment.doctor_id, Appointment.disease, Appointment.status,
+            Appointment.video_channel, Appointment.ai_analysis,
+            Appointment.report_files, Appointment.report_names,
+            User.name.label("patient_name"),
+            Slot.start.label("slot_start"), Slot.end.label("slot_end"),
+        )
+        .select_from(Appointment)
+        .outerjoin(User, User.id == Appointment.patient_id)
+        .outerjoin(Slot, Slot.id == Appointment.slot_id)
+        .where(condition)
+    ).all()
+
+
+def refresh_dashboard_rows(conn, appointment_ids):
+    """Rewrite the read-model rows for these appointments (deleted ones vanish)."""
+    appointment_ids = list(appointment_ids)
+    if not appointment_ids:
+        return 0
+
+    conn.execute(
+        db.delete(DoctorDashboardRow).where(DoctorDashboardRow.appointment_id.in_(appointment_ids))
+    )
+    rows = [
+        {"appointment_id": r.id, "doctor_id": r.doctor_id,
+         "payload": build_payload(r), "updated_at": datetime.utcnow()}
+        for r in _source_rows(conn, Appointment.id.in_(appointment_ids))
+        if r.doctor_id is not None
+    ]
+    if rows:
+        conn.execute(db.insert(DoctorDashboardRow), rows)
+    return len(rows)
+
+
+def backfill_dashboard(conn, doctor_id=None, batch_size=500):
+    """Rewrite the read model from the appointments table on `conn`."""
+    query = db.select(Appointment.id).order_by(Appointment.id)
+    if doctor_id is not None:
+        query = query.where(Appointment.doctor_id == doctor_id)
+    ids = conn.execute(query).scalars().all()
+
+    for i in range(0, len(ids), batch_size):
+        refresh_dashboard_rows(conn, ids[i:i + batch_size])
+    return len(ids)
+
+
+def rebuild_dashboard(doctor_id=None, batch_size=500):
+    """Backfill / repair the read model from the appointments table."""
+    count = backfill_dashboard(db.session.connection(), doctor_id, batch_size)
+    db.session.commit()
+    return count
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_dashboard_rows(session, flush_context):
+    changed = set()
+    moved_slots = set()
+    renamed = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Appointment) and obj.id is not None:
+            changed.add(obj.id)
+        elif isinstance(obj, Slot) and obj.id is not None and obj in session.dirty:
+            state = db.inspect(obj)
+            if state.attrs.start.history.has_changes() or state.attrs.end.history.has_changes():
+                moved_slots.add(obj.id)
+        elif isinstance(obj, User) and obj.id is not None and obj in session.dirty:
+            if db.inspect(obj).attrs.name.history.has_changes():
+                renamed.add(obj.id)
+
+    if not changed and not moved_slots and not renamed:
+        return
+
+    conn = session.connection()
+    if moved_slots:
+        changed.update(conn.execute(
+            db.select(Appointment.id).where(Appointment.slot_id.in_(moved_slots))
+        ).scalars())
+    if renamed:
+        # patient_name is copied into the payload: rewrite it, and let the
+        # doctors' cached dashboard pages (ETags) go stale
+        affected = conn.execute(
+            db.select(Appointment.id, Appointment.doctor_id)
+            .where(Appointment.patient_id.in_(renamed))
+        ).all()
+        changed.update(a.id for a in affected)
+        keys = {doctor_appts_key(a.doctor_id) for a in affected}
+        # a renamed doctor shows up as doctor_name in their patients' lists
+        keys.update(patient_appts_key(patient_id) for patient_id in conn.execute(
+            db.select(Appointment.patient_id).distinct()
+            .join(Doctor, Doctor.id == Appointment.doctor_id)
+            .where(Doctor.user_id.in_(renamed))
+        ).scalars())
+        bump_versions(conn, keys)
+    refresh_dashboard_rows(conn, changed)
+
+
+def dashboard_page(doctor_id, before_id=None, limit=50):
+    """Raw JSON payloads for one page, newest first; one indexed SELECT."""
+    query = (
+        db.select(DoctorDashboardRow.appointment_id, DoctorDashboardRow.payload)
+        .where(DoctorDashboardRow.doctor_id == doctor_id)
+        .order_by(DoctorDashboardRow.appointment_id.desc())
+        .limit(limit)
+    )
+    if before_id is not None:
+        query = query.where(DoctorDashboardRow.appointment_id < before_id)
+    return db.session.execute(query).all()
@@ -1,8 +1,79 @@
-import pandas as pd
+import logging
+import re
+import threading
 
-doctor_data = pd.read_csv("data/doctor_list.csv")
-doctor_data.columns = [c.strip().lower() for c in doctor_data.columns]
+DOCTOR_CSV = "data/doctor_list.csv"
 
-print("✅ Doctor dataset loaded successfully.")
-print("📋 Columns:", list(doctor_data.columns))
-print("🔹 Sample entry:", doctor_data.head(1).to_dict(orient="records"))
+log = logging.getLogger(__name__)
+
+_doctor_data = None
+_catalogue = None
+_lock = threading.Lock()
+
+
+def get_doctor_data():
+    """The doctor dataset as a DataFrame, read (and pandas imported) on first use."""
+    global _doctor_data
+    if _doctor_data is None:
+        with _lock:
+            if _doctor_data is None:
+                import pandas as pd
+
+                data = pd.read_csv(DOCTOR_CSV)
+                data.columns = [c.strip().lower() for c in data.columns]
+
+                log.info("Doctor dataset loaded", extra={"rows": len(data)})
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("Columns: %s", list(data.columns))
+                    log.debug("Sample entry: %s", data.head(1).to_dict(orient="records"))
+                _doctor_data = data
+    return _doctor_data
+
+
+def _safe_float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def get_doctor_catalogue():
+    """The dataset pre-digested for the matcher: one record per doctor with
+    its lowercased search text and token set, plus the rating / experience
+    maxima used for normalisation. Built once; treat it as read-only (gunicorn
+    workers share it copy-on-write when it is built before fork)."""
+    global _catalogue
+    if _catalogue is None:
+        data = get_doctor_data()
+        with _lock:
+            if _catalogue is None:
+                doctors = []
+                for row in data.to_dict(orient="records"):
+                    combined = " ".join([
+                        str(row.get("speciality", "")),
+                        str(row.get("keywords", "")),
+                        str(row.get("treated_diseases", "")),
+                    ]).lower()
+                    doctors.append({
+                        "row": row,
+                        "combined": combined,
+                        "tokens": frozenset(re.findall(r"[a-zA-Z]+", combined)),
+                        "rating": _safe_float(row.get("rating")),
+                        "experience": _safe_float(row.get("experience (years)")),
+                    })
+                # NaN != NaN: skip missing values like pandas' max() does
+                ratings = [d["rating"] for d in doctors if d["rating"] == d["rating"]]
+                years = [d["experience"] for d in doctors if d["experience"] == d["experience"]]
+                _catalogue = {
+                    "doctors": tuple(doctors),
+                    "max_rating": max(ratings, default=0.0) or 5.0,
+                    "max_exp": max(years, default=0.0) or 30.0,
+                }
+    return _catalogue
+
+
+def __getattr__(name):
+    # `from core.data_loader import doctor_data` keeps working, loading on demand
+    if name == "doctor_data":
+        return get_doctor_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
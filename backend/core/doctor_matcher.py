@@ -1,10 +1,18 @@
 import json
+import logging
+import os
 import re
 from difflib import SequenceMatcher
-import google.generativeai as genai
+from core.config import genai
 from core.gemini_utils import get_related_terms_with_gemini
-from core.data_loader import doctor_data
-from core.models import Doctor  # ✅ import the SQLAlchemy Doctor model
+from core.metrics import track_gemini
+from core.data_loader import get_doctor_data, get_doctor_catalogue
+from core.availability import lookup_doctor, availability_for
+
+# Share of the final score given to availability (free slots soon); 0 turns it off
+MATCHER_AVAILABILITY_WEIGHT = float(os.getenv("MATCHER_AVAILABILITY_WEIGHT", "0.2"))
+
+log = logging.getLogger(__name__)
 
 
 # ============================================================
@@ -25,7 +33,8 @@ def call_gemini(extracted_text):
     - explanation
     """
 
-    response = model.generate_content(prompt)
+    with track_gemini("analyze_report"):
+        response = model.generate_content(prompt)
     text = response.text.strip()
 
     # Try parsing Gemini’s output safely
@@ -58,14 +67,14 @@ def text_similarity(a, b):
 def match_doctors_from_dataset(disease_name, top_n=3):
     """
     Match doctors from CSV + DB using keyword similarity, Gemini-enhanced synonyms,
-    experience, and rating weighting.
+    experience, rating and availability weighting.
     """
     if not disease_name:
-        print("⚠️ No disease name provided.")
+        log.warning("No disease name provided")
         return []
 
-    print(f"\n🧠 Matching doctors for: {disease_name}")
-    df = doctor_data.copy()
+    log.debug("Matching doctors for %r", disease_name)
+    catalogue = get_doctor_catalogue()
 
     # 🔹 Expand disease context using Gemini
     gemini_terms = get_related_terms_with_gemini(disease_name)
@@ -81,50 +90,45 @@ def match_doctors_from_dataset(disease_name, top_n=3):
 
     results = []
 
-    def safe_float(x, default=0.0):
-        try:
-            return float(x)
-        except Exception:
-            return default
-
-    # Normalization constants
-    max_rating = df["rating"].apply(safe_float).max() or 5.0
-    max_exp = df["experience (years)"].apply(safe_float).max() or 30.0
+    # Normalization constants (precomputed with the catalogue)
+    max_rating = catalogue["max_rating"]
+    max_exp = catalogue["max_exp"]
 
     # ============================================================
     # 🔎 Match doctors using similarity + rating + experience
     # ============================================================
-    for _, row in df.iterrows():
-        combined = " ".join([
-            str(row.get("speciality", "")),
-            str(row.get("keywords", "")),
-            str(row.get("treated_diseases", "")),
-        ]).lower()
-
-        doc_tokens = set(re.findall(r"[a-zA-Z]+", combined))
+    for doctor in catalogue["doctors"]:
+        row = doctor["row"]
+        combined = doctor["combined"]
 
-        overlap = len(disease_tokens.intersection(doc_tokens)) / max(1, len(disease_tokens))
+        overlap = len(disease_tokens.intersection(doctor["tokens"])) / max(1, len(disease_tokens))
         fuzzy_scores = [text_similarity(t, combined) for t in disease_tokens]
         fuzzy = max(fuzzy_scores) if fuzzy_scores else 0.0
 
-        rating = safe_float(row.get("rating"))
-        exp = safe_float(row.get("experience (years)"))
+        rating = doctor["rating"]
+        exp = doctor["experience"]
 
         # Weighted scoring
-        final_score = (
+        match_score = (
             0.6 * max(overlap, fuzzy)
             + 0.25 * (rating / max_rating)
             + 0.15 * (exp / max_exp)
         )
 
-        # Only include strong matches
-        if final_score > 0.25:
+        # Only include strong matches (availability re-ranks, it doesn't qualify)
+        if match_score > 0.25:
             email = str(row.get("email", "")).strip().lower()
-            doctor_in_db = Doctor.query.filter_by(email=email).first()
+            doctor_id, user_id = lookup_doctor(email)  # in-memory, no query per row
+            availability = availability_for(doctor_id)
+
+            final_score = (
+                (1 - MATCHER_AVAILABILITY_WEIGHT) * match_score
+                + MATCHER_AVAILABILITY_WEIGHT * availability["score"]
+            )
 
             results.append({
-                "id": doctor_in_db.id if doctor_in_db else None,  # ✅ DB doctor id
-                "user_id": doctor_in_db.user_id if doctor_in_db else None,
+                "id": doctor_id,  # ✅ DB doctor id
+                "user_id": user_id,
                 "name": row.get("doctor's name", "Dr. Unknown"),
                 "speciality": row.get("speciality", "N/A"),
                 "location": row.get("location", "N/A"),
@@ -133,11 +137,13 @@ def match_doctors_from_dataset(disease_name, top_n=3):
                 "score": round(final_score, 3),
                 "email": email,
                 "phone": row.get("phone", "N/A"),
+                "free_slots": availability["free_slots"],
+                "earliest_slot": availability["earliest_slot"],
             })
 
     # Sort by overall score
     results = sorted(results, key=lambda x: x["score"], reverse=True)
-    print(f"🏁 Found {len(results)} doctors with score > 0.25")
+    matched = len(results)
 
     # ============================================================
     # 🩺 Fallback Logic: If no doctors matched
@@ -159,7 +165,8 @@ def match_doctors_from_dataset(disease_name, top_n=3):
 
         for term, spec in fallback_map.items():
             if term in disease_name.lower() or term in " ".join(gemini_terms):
-                print(f"🩺 Fallback mapping: {term} → {spec}")
+                log.debug("Fallback mapping: %s -> %s", term, spec)
+                df = get_doctor_data()
                 fallback_doctors = (
                     df[df["speciality"].str.lower().str.contains(spec.lower(), na=False)]
                     .sort_values(by="rating", ascending=False)
@@ -169,9 +176,11 @@ def match_doctors_from_dataset(disease_name, top_n=3):
 
                 for doc in fallback_doctors:
                     email = str(doc.get("email", "")).strip().lower()
-                    doctor_in_db = Doctor.query.filter_by(email=email).first()
+                    doctor_id, user_id = lookup_doctor(email)
+                    availability = availability_for(doctor_id)
                     results.append({
-                        "id": doctor_in_db.id if doctor_in_db else None,
+                        "id": doctor_id,
+                        "user_id": user_id,
                         "name": doc.get("doctor's name", "Dr. Unknown"),
                         "speciality": doc.get("speciality", "N/A"),
                         "location": doc.get("location", "N/A"),
@@ -180,17 +189,19 @@ def match_doctors_from_dataset(disease_name, top_n=3):
                         "score": 0.5,
                         "email": email,
                         "phone": doc.get("phone", "N/A"),
+                        "free_slots": availability["free_slots"],
+                        "earliest_slot": availability["earliest_slot"],
                     })
                 break
 
     # ============================================================
-    # ✅ Final debug print for visibility
+    # ✅ Summary (top matches only at DEBUG, skipped entirely otherwise)
     # ============================================================
-    if results:
-        print("🏆 Top matches:")
+    log.info("Doctor matching done", extra={"matched": matched, "returned": min(len(results), top_n),
+                                            "fallback": not matched})
+    if log.isEnabledFor(logging.DEBUG):
         for d in results[:3]:
-            print(f"   → {d['name']} ({d['speciality']}) ⭐{d['rating']} | {d['score']}")
-    else:
-        print("⚠️ No matches found; fallback applied.")
+            log.debug("Top match: %s (%s) rating=%s score=%s",
+                      d["name"], d["speciality"], d["rating"], d["score"])
 
     return results[:top_n]
@@ -1,80 +1,263 @@
 import os
+import time
+import logging
 import smtplib
+import threading
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.header import Header
 from email.mime.application import MIMEApplication
 from dotenv import load_dotenv
 import re
+from core.upload_store import wait_for
+from core.metrics import track_smtp
 
 load_dotenv()
 
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
+log = logging.getLogger(__name__)
+
+SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "1") == "1"
+SMTP_AUTH = os.getenv("SMTP_AUTH", "1") == "1"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+
+# Connection pool
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "240"))   # close sessions idle longer than this
+SMTP_NOOP_AFTER = float(os.getenv("SMTP_NOOP_AFTER", "30"))        # NOOP-check sessions idle longer than this
 
 EMAIL_ADDRESS = os.getenv("MAIL_USERNAME")
 EMAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
 
+# Errors that mean the session itself is gone (every SMTPException is an
+# OSError, so recipient/content errors must not be caught by a bare OSError)
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+# Replies that mean the server is ending or can't continue the session (421
+# "service not available, closing channel", 454 "temporarily unavailable");
+# other codes are about the one message and leave the session usable
+SESSION_LEVEL_CODES = {421, 454}
+
+
+def is_connection_error(e):
+    """True if the SMTP session that raised `e` must not be reused."""
+    if isinstance(e, CONNECTION_ERRORS):
+        return True
+    return isinstance(e, smtplib.SMTPResponseException) and e.smtp_code in SESSION_LEVEL_CODES
+
 
 def remove_emojis_and_unicode(text):
     # Remove emojis and all non ASCII characters
     return text.encode("ascii", "ignore").decode()
 
-def send_email(to, subject, body, attachment_paths=None):
-    """Send UTF-8 safe emails with attachments."""
+
+# -----------------------------
+# 🔌 SMTP CONNECTION POOL
+# -----------------------------
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP sessions around so each email doesn't pay
+    for a new TCP + STARTTLS + AUTH handshake."""
+
+    def __init__(self, max_size=SMTP_POOL_SIZE, idle_timeout=SMTP_IDLE_TIMEOUT,
+                 noop_after=SMTP_NOOP_AFTER):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self._idle = []          # [(conn, last_used)]
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "reused": 0, "discarded": 0}
+
+    def _open(self):
+        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        if SMTP_USE_TLS:
+            server.starttls()
+        if SMTP_AUTH:
+            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
+        self._count("opened")
+        return server
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _is_alive(self, server):
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_timeout or (idle_for > self.noop_after and not self._is_alive(server)):
+                self._count("discarded")
+                self._close(server)
+                continue
+
+            self._count("reused")
+            return server
+
+        return self._open()
+
+    def release(self, server, broken=False):
+        if not broken:
+            with self._lock:
+                if len(self._idle) < self.max_size:
+                    self._idle.append((server, time.monotonic()))
+                    return
+        else:
+            self._count("discarded")
+        self._close(server)
+
+    @contextmanager
+    def connection(self):
+        server = self.acquire()
+        try:
+            yield server
+        except Exception as e:
+            # A rejected recipient leaves the session usable; a dropped
+            # connection or a 421 "closing channel" does not
+            self.release(server, broken=is_connection_error(e))
+            raise
+        else:
+            self.release(server)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+
+smtp_pool = SMTPConnectionPool()
+
+
+def build_message(to, subject, body, attachment_paths=None):
+    """Build a UTF-8 safe MIME message with attachments."""
+    # Create message container
+    msg = MIMEMultipart()
+    msg["From"] = str(Header(EMAIL_ADDRESS, "utf-8"))
+    msg["To"] = str(Header(to, "utf-8"))
+    msg["Subject"] = Header(subject, "utf-8")
+
+    # 🔥 Ensure full UTF-8 support for email content
+    msg.attach(MIMEText(body, "plain", "utf-8"))
+
+    # -----------------------------
+    # 📎 Attachments (UTF-8 Safe)
+    # -----------------------------
+    if attachment_paths:
+        for file_path in attachment_paths:
+            try:
+                # Uploads are persisted in the background; make sure it landed
+                if not wait_for(file_path):
+                    log.warning("Attachment not found: %s", file_path)
+                    continue
+
+                with open(file_path, "rb") as f:
+                    file_data = f.read()
+
+                filename = os.path.basename(file_path)
+
+                part = MIMEApplication(file_data, Name=filename)
+                # UTF-8 encode filename so Gmail accepts it safely
+                part.add_header(
+                    "Content-Disposition",
+                    f'attachment; filename="{Header(filename, "utf-8").encode()}"'
+                )
+
+                msg.attach(part)
+                log.debug("Attached %s", filename)
+
+            except Exception as e:
+                log.error("Failed attaching %s: %s", file_path, e)
+
+    return msg
+
+
+def _sendmail(server, to, msg):
+    server.sendmail(EMAIL_ADDRESS, to, msg.as_string())
+
+
+def send_batch(messages):
+    """Deliver many emails over one pooled SMTP session.
+
+    `messages` is a list of dicts with to / subject / body / attachment_paths.
+    Returns a list with None for each delivered message or the exception
+    that stopped it, in the same order.
+    """
     if not EMAIL_ADDRESS or not EMAIL_PASSWORD:
-        print("❌ Email config missing (MAIL_USERNAME or MAIL_PASSWORD empty)")
-        return
-
-    try:
-        # Create message container
-        msg = MIMEMultipart()
-        msg["From"] = str(Header(EMAIL_ADDRESS, "utf-8"))
-        msg["To"] = str(Header(to, "utf-8"))
-        msg["Subject"] = Header(subject, "utf-8")
-
-        # 🔥 Ensure full UTF-8 support for email content
-        msg.attach(MIMEText(body, "plain", "utf-8"))
-
-        # -----------------------------
-        # 📎 Attachments (UTF-8 Safe)
-        # -----------------------------
-        if attachment_paths:
-            for file_path in attachment_paths:
-                try:
-                    if not os.path.exists(file_path):
-                        print(f"⚠️ Attachment not found: {file_path}")
-                        continue
-
-                    with open(file_path, "rb") as f:
-                        file_data = f.read()
-
-                    filename = os.path.basename(file_path)
-
-                    part = MIMEApplication(file_data, Name=filename)
-                    # UTF-8 encode filename so Gmail accepts it safely
-                    part.add_header(
-                        "Content-Disposition",
-                        f'attachment; filename="{Header(filename, "utf-8").encode()}"'
-                    )
-
-                    msg.attach(part)
-                    print(f"📎 Attached: {filename}")
-
-                except Exception as e:
-                    print(f"❌ Failed attaching {file_path}: {e}")
-
-        # -----------------------------
-        # ✉️ SEND MAIL (UTF-8 Safe)
-        # -----------------------------
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-
-        server.sendmail(EMAIL_ADDRESS, to, msg.as_string())
-        server.quit()
-
-        print(f"📧 Email successfully sent → {to}")
-
-    except Exception as e:
-        print("❌ Email sending failed:", e)
+        log.error("Email config missing (MAIL_USERNAME or MAIL_PASSWORD empty)")
+        error = RuntimeError("Email config missing (MAIL_USERNAME or MAIL_PASSWORD empty)")
+        return [error] * len(messages)
+
+    with track_smtp():
+        return _send_pending(list(messages))
+
+
+def _send_pending(pending):
+    results = []
+    retried = False
+
+    while pending:
+        try:
+            with smtp_pool.connection() as server:
+                while pending:
+                    m = pending[0]
+                    try:
+                        msg = build_message(m["to"], m["subject"], m["body"], m.get("attachment_paths"))
+                        _sendmail(server, m["to"], msg)
+                        results.append(None)
+                        log.info("Email sent", extra={"to": m["to"]})
+                    except Exception as e:
+                        if is_connection_error(e):
+                            raise   # reconnect below and resend from this message
+                        log.error("Email sending failed: %s", e, extra={"to": m["to"]})
+                        results.append(e)
+                    pending.pop(0)
+        except Exception as e:
+            # Session died (stale pooled connection, network blip): reconnect once
+            if not retried:
+                retried = True
+                continue
+            log.error("Email sending failed, %d messages not sent: %s", len(pending), e)
+            results.extend([e] * len(pending))
+            pending = []
+
+    return results
+
+
+def send_email(to, subject, body, attachment_paths=None, raise_errors=False):
+    """Send UTF-8 safe emails with attachments.
+
+    Returns True when the message was handed to the SMTP server. With
+    raise_errors=True failures propagate (used by the outbox worker to retry).
+    """
+    error = send_batch([{
+        "to": to,
+        "subject": subject,
+        "body": body,
+        "attachment_paths": attachment_paths
+    }])[0]
+
+    if error is not None:
+        if raise_errors:
+            raise error
+        return False
+    return True
@@ -1,36 +1,62 @@
-import os, tempfile
-import fitz
-from PIL import Image
-import pytesseract
+import io
+from core.lazy import lazy_module
+from core.upload_store import persist_async
 
-def extract_text_from_file(file):
-    filename = file.filename.lower()
-    temp_path = os.path.join(tempfile.gettempdir(), filename)
-    file.save(temp_path)
+# PDF / OCR libraries load on the first upload that needs them
+fitz = lazy_module("fitz")
+Image = lazy_module("PIL.Image")
+pytesseract = lazy_module("pytesseract")
 
+
+def _extract(filename, data=None, path=None):
+    filename = filename.lower()
     text = ""
     try:
         if filename.endswith(".pdf"):
-            with fitz.open(temp_path) as doc:
+            doc = fitz.open(path) if path else fitz.open(stream=data, filetype="pdf")
+            with doc:
                 for page in doc:
                     text += page.get_text("text")
         elif filename.endswith((".png", ".jpg", ".jpeg")):
-            img = Image.open(temp_path)
-            text = pytesseract.image_to_string(img)
+            with Image.open(path or io.BytesIO(data)) as img:
+                text = pytesseract.image_to_string(img)
         elif filename.endswith(".txt"):
-            with open(temp_path, "r", encoding="utf-8") as f:
-                text = f.read()
+            if path:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            else:
+                text = data.decode("utf-8")
         else:
             text = "Unsupported file format."
     except Exception as e:
         text = f"Error reading file: {str(e)}"
 
+    return text.strip()
+
+
+def extract_text_from_bytes(data, filename):
+    """Parse a report straight from memory (no temp-file round trip)."""
+    return _extract(filename, data=data)
+
+
+def extract_text_from_path(path, filename):
+    """Parse a report that is already on disk (e.g. an assembled chunked upload)."""
+    return _extract(filename, path=path)
+
+
+def extract_text_from_file(file):
+    filename = file.filename.lower()
+    data = file.read()
+
+    text = extract_text_from_bytes(data, filename)
+
     # 🚨 DO NOT DELETE FILE
-    # We need this file for doctor email attachment
-    # os.remove(temp_path)
+    # We need this file for doctor email attachment.
+    # Written in the background so the request never waits on disk I/O.
+    file_path = persist_async(filename, data)
 
     return {
-        "text": text.strip(),
-        "file_path": temp_path,
+        "text": text,
+        "file_path": file_path,
         "filename": filename
     }
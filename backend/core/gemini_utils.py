@@ -1,13 +1,25 @@
 import os
 import json
-import google.generativeai as genai
+import logging
+from core.config import genai
+from core.metrics import track_gemini
+
+log = logging.getLogger(__name__)
 
 cache_file = "data/term_cache.json"
-if os.path.exists(cache_file):
-    with open(cache_file, "r") as f:
-        term_cache = json.load(f)
-else:
-    term_cache = {}
+_term_cache = None
+
+
+def get_term_cache():
+    """Gemini keyword cache, read from disk on first use."""
+    global _term_cache
+    if _term_cache is None:
+        if os.path.exists(cache_file):
+            with open(cache_file, "r") as f:
+                _term_cache = json.load(f)
+        else:
+            _term_cache = {}
+    return _term_cache
 
 # --- NEW FUNCTION FOR STRUCTURED AI ANALYSIS ---
 def get_second_opinion_with_gemini(report_text, report_images=None):
@@ -61,17 +73,18 @@ def get_second_opinion_with_gemini(report_text, report_images=None):
         # Prepare content (text and optional images - assuming image handling logic elsewhere)
         contents = [prompt]
         
-        response = model.generate_content(
-            contents,
-            config={"response_mime_type": "application/json", "response_schema": response_schema}
-        )
+        with track_gemini("second_opinion"):
+            response = model.generate_content(
+                contents,
+                config={"response_mime_type": "application/json", "response_schema": response_schema}
+            )
         
         analysis_data = json.loads(response.text)
-        print(f"✅ Gemini Analysis successful. Risk: {analysis_data.get('risk_category')}")
+        log.info("Gemini analysis done", extra={"risk_category": analysis_data.get("risk_category")})
         return analysis_data
 
     except Exception as e:
-        print("⚠️ Gemini analysis failed:", str(e))
+        log.warning("Gemini analysis failed: %s", e)
         return {
             "error": "Gemini analysis failed",
             "message": str(e),
@@ -84,6 +97,7 @@ def get_second_opinion_with_gemini(report_text, report_images=None):
 def get_related_terms_with_gemini(disease):
     """Ask Gemini for related medical terms and cache them locally."""
     disease = disease.lower().strip()
+    term_cache = get_term_cache()
     if disease in term_cache:
         return term_cache[disease]
 
@@ -95,13 +109,14 @@ def get_related_terms_with_gemini(disease):
         Include symptoms, affected organs, causes, and related medical terms.
         Return ONLY a comma-separated list.
         """
-        response = model.generate_content(prompt)
+        with track_gemini("related_terms"):
+            response = model.generate_content(prompt)
         keywords = [w.strip().lower() for w in response.text.split(",") if w.strip()]
         term_cache[disease] = keywords
         with open(cache_file, "w") as f:
             json.dump(term_cache, f, indent=2)
-        print(f"🔮 Gemini keywords for {disease}: {keywords}")
+        log.debug("Gemini keywords for %r: %s", disease, keywords)
         return keywords
     except Exception as e:
-        print("⚠️ Gemini keyword generation failed:", str(e))
+        log.warning("Gemini keyword generation failed: %s", e)
         return []
\ No newline at end of file
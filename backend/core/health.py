@@ -0,0 +1,34 @@
+import time
+from sqlalchemy import text
+from core.database import db
+
+
+def pool_stats():
+    pool = db.engine.pool
+    stats = {"class": type(pool).__name__}
+    # QueuePool reports sizes; SQLite's pools don't
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+def database_health():
+    """Round-trip `SELECT 1` and report latency plus pool usage."""
+    started = time.perf_counter()
+    try:
+        db.session.execute(text("SELECT 1"))
+        db.session.rollback()
+        ok, error = True, None
+    except Exception as e:
+        db.session.rollback()
+        ok, error = False, str(e).splitlines()[0]
+
+    return {
+        "ok": ok,
+        "error": error,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "dialect": db.engine.dialect.name,
+        "pool": pool_stats(),
+    }
@@ -0,0 +1,22 @@
+import time
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+def start_periodic_job(app, name, interval, fn):
+    """Run `fn()` inside an app context every `interval` seconds on a daemon thread."""
+    def run():
+        while True:
+            try:
+                with app.app_context():
+                    fn()
+            except Exception:
+                log.exception("Background job %r failed", name)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    log.info("Started background job %r (every %ss)", name, interval)
+    return thread
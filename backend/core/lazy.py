@@ -0,0 +1,56 @@
+import importlib
+import threading
+
+_registry = []
+
+
+class LazyModule:
+    """Stand-in for a heavy module, imported on first attribute access.
+
+        fitz = lazy_module("fitz")      # nothing imported yet
+        fitz.open(path)                 # imports PyMuPDF here, once
+
+    `setup(module)` runs once right after the real import (e.g. to configure
+    an SDK with its API key).
+    """
+
+    def __init__(self, name, setup=None):
+        self._name = name
+        self._setup = setup
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._setup:
+                        self._setup(module)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name, setup=None):
+    module = LazyModule(name, setup)
+    _registry.append(module)
+    return module
+
+
+def load_all():
+    """Import every registered lazy module now (pre-fork warmup). Returns
+    {name: error} for the ones that failed; they stay lazy and retry later."""
+    failed = {}
+    for module in _registry:
+        try:
+            module._load()
+        except Exception as e:
+            failed[module._name] = e
+    return failed
@@ -0,0 +1,168 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, request
+
+# Structured logging that never blocks a request on stdout. Records are
+# enqueued by the calling thread (a few microseconds, dropped if the queue is
+# full) and a QueueListener thread formats them as JSON lines and writes them.
+#
+#   LOG_LEVEL=DEBUG      per-match debug detail (off by default, and free:
+#                        guarded with isEnabledFor / %-style lazy args)
+#   LOG_FORMAT=text      human-readable lines for local development
+#   LOG_QUEUE_SIZE       records buffered before new ones are dropped
+#
+# Every record carries the id of the request it was logged from (taken from
+# an incoming X-Request-ID header, or generated) and the response echoes it.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+request_id = ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "taskName",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                  + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.request_id:
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        return f"{text}\n{record.exc_text}" if record.exc_text else text
+
+
+class RequestQueueHandler(QueueHandler):
+    """QueueHandler that stamps the request id (in the caller's context),
+    renders the message and traceback up front, and drops instead of
+    blocking when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)   # other handlers must see the original
+        record.request_id = request_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            notice = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                       "%d log records dropped (queue full)", (dropped,), None)
+            self.handle(notice)
+
+
+_handler = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def _start_listener():
+    global _listener
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+    _handler.queue = log_queue
+    _listener = QueueListener(log_queue, output)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork (gunicorn workers); give the
+    # child its own queue and thread
+    if _handler is not None:
+        _start_listener()
+
+
+def _stop():
+    if _listener is not None:
+        _listener.stop()    # drains what is still queued
+
+
+def configure_logging():
+    """Route the root logger through the queue. Safe to call more than once."""
+    global _handler
+    with _setup_lock:
+        if _handler is not None:
+            return
+        _handler = RequestQueueHandler(None)
+        _start_listener()
+
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(LOG_LEVEL)
+
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        atexit.register(_stop)
+
+
+# -----------------------------
+# 🔖 Request ids
+# -----------------------------
+def _start_request():
+    incoming = request.headers.get("X-Request-ID", "")[:64]
+    g.request_id_token = request_id.set(incoming or uuid.uuid4().hex)
+
+
+def _add_request_id(response):
+    rid = request_id.get()
+    if rid:
+        response.headers["X-Request-ID"] = rid
+    return response
+
+
+def _end_request(exc):
+    token = g.pop("request_id_token", None)
+    if token is not None:
+        request_id.reset(token)
+
+
+def init_app(app):
+    configure_logging()
+    app.before_request(_start_request)
+    app.after_request(_add_request_id)
+    app.teardown_request(_end_request)
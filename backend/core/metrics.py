@@ -0,0 +1,149 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest, multiprocess
+)
+
+# Prometheus histograms per blueprint / route, served on GET /metrics.
+# Per request: wall time, SQL statement count and DB time (SQLAlchemy cursor
+# events), plus the latency of each Gemini call and SMTP send made while
+# handling it. Work outside a request (outbox worker, archiver) is labelled
+# route="background".
+#
+# Under gunicorn every worker keeps its own numbers; set
+# PROMETHEUS_MULTIPROC_DIR (an empty directory, before the server starts)
+# and /metrics aggregates across workers (see gunicorn.conf.py).
+
+LABELS = ["blueprint", "route"]
+BACKGROUND = {"blueprint": "", "route": "background"}
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Wall time per request",
+    LABELS + ["method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request", LABELS,
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+SQL_SECONDS = Histogram(
+    "http_request_sql_seconds", "Time spent in SQL per request", LABELS,
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+GEMINI_SECONDS = Histogram(
+    "gemini_call_duration_seconds", "Latency of each Gemini API call", LABELS + ["operation"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+SMTP_SECONDS = Histogram(
+    "smtp_send_duration_seconds", "Time to deliver one batch of emails over SMTP", LABELS,
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+
+# {"labels": {...}, "statements": int, "sql_seconds": float} for the request
+# being handled on this thread / context, None elsewhere
+_current = ContextVar("request_metrics", default=None)
+
+
+def _labels():
+    current = _current.get()
+    return current["labels"] if current else BACKGROUND
+
+
+# -----------------------------
+# 🗄️ SQL: count + time every cursor execution
+# -----------------------------
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = _current.get()
+    started = conn.info.get("metrics_started")
+    if current is not None and started:
+        current["statements"] += 1
+        current["sql_seconds"] += time.perf_counter() - started.pop()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    started = exception_context.connection.info.get("metrics_started") \
+        if exception_context.connection is not None else None
+    if started:
+        started.pop()
+
+
+# -----------------------------
+# 🌐 External calls
+# -----------------------------
+@contextmanager
+def track_gemini(operation):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        GEMINI_SECONDS.labels(operation=operation, **_labels()).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def track_smtp():
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        SMTP_SECONDS.labels(**_labels()).observe(time.perf_counter() - started)
+
+
+# -----------------------------
+# ⏱️ Request hooks
+# -----------------------------
+def _start_request():
+    rule = request.url_rule
+    g.metrics_token = _current.set({
+        # unmatched URLs share one label so 404 scans can't blow up cardinality
+        "labels": {"blueprint": request.blueprint or "",
+                   "route": rule.rule if rule is not None else "<unmatched>"},
+        "started": time.perf_counter(),
+        "statements": 0,
+        "sql_seconds": 0.0,
+    })
+
+
+def _finish_request(response):
+    current = _current.get()
+    if current is not None:
+        labels = current["labels"]
+        REQUEST_SECONDS.labels(method=request.method, status=str(response.status_code), **labels) \
+            .observe(time.perf_counter() - current["started"])
+        SQL_STATEMENTS.labels(**labels).observe(current["statements"])
+        SQL_SECONDS.labels(**labels).observe(current["sql_seconds"])
+    return response
+
+
+def _end_request(exc):
+    token = g.pop("metrics_token", None)
+    if token is not None:
+        _current.reset(token)
+
+
+def init_app(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
+
+
+def render():
+    """(body, content type) of the Prometheus text exposition."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,4 +1,5 @@
 from core.database import db
+from core.compression import CompressedText
 from datetime import datetime
 
 # ============================
@@ -35,14 +36,14 @@ class Doctor(db.Model):
     __tablename__ = "doctors"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
 
     speciality = db.Column(db.String(100))
     experience = db.Column(db.String(50))
     rating = db.Column(db.String(10))
     location = db.Column(db.String(100))
     phone = db.Column(db.String(50))
-    email = db.Column(db.String(255))
+    email = db.Column(db.String(255), index=True)
 
     user = db.relationship("User", backref=db.backref("doctor_profile", uselist=False))
 
@@ -55,25 +56,86 @@ class Doctor(db.Model):
 # ============================
 class Slot(db.Model):
     __tablename__ = "slots"
+    __table_args__ = (
+        db.Index("ix_slots_doctor_booked_start", "doctor_id", "is_booked", "start"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     doctor_id = db.Column(db.Integer, db.ForeignKey("doctors.id"), nullable=False)
 
-    start = db.Column(db.String(20))
-    end = db.Column(db.String(20))
+    start = db.Column(db.DateTime(timezone=True))
+    end = db.Column(db.DateTime(timezone=True))
     is_booked = db.Column(db.Boolean, default=False)
 
 
+# ============================
+# DOCTOR DASHBOARD READ MODEL
+# ============================
+class DoctorDashboardRow(db.Model):
+    """One appointment as the doctor dashboard shows it, pre-serialized.
+
+    Maintained by core.dashboard on every flush that touches an appointment.
+    """
+    __tablename__ = "doctor_dashboard_rows"
+    __table_args__ = (
+        db.Index("ix_doctor_dashboard_rows_doctor_appt", "doctor_id", "appointment_id"),
+    )
+
+    appointment_id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)      # JSON object
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ============================
+# RESOURCE VERSION COUNTERS
+# ============================
+class ResourceVersion(db.Model):
+    """Bumped on every write to a listing; drives ETags (see core.versions)."""
+    __tablename__ = "resource_versions"
+
+    key = db.Column(db.String(100), primary_key=True)    # e.g. "doctor_appts:42"
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ============================
+# SLOT ARCHIVE MODEL
+# ============================
+class SlotArchive(db.Model):
+    """Expired, never-booked slots moved out of the hot slots table."""
+    __tablename__ = "slots_archive"
+
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, index=True)
+
+    start = db.Column(db.DateTime(timezone=True))
+    end = db.Column(db.DateTime(timezone=True))
+    is_booked = db.Column(db.Boolean)
+
+    archived_at = db.Column(db.DateTime(timezone=True))
+
+
 # ============================
 # USER REPORT MODEL
 # ============================
 class UserReport(db.Model):
     __tablename__ = "user_reports"
+    __table_args__ = (
+        db.Index("ix_user_reports_user_id_id", "user_id", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # Nullable: second opinions can be requested before logging in
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    user_name = db.Column(db.String(255))
 
     file_path = db.Column(db.String(512), nullable=False)
+    file_paths = db.Column(db.Text)   # JSON list of all uploaded files
+    filenames = db.Column(db.Text)    # JSON list
+
+    # Full OCR / PDF text, stored compressed (can be hundreds of KB)
+    extracted_text = db.Column(CompressedText)
 
     ai_analysis = db.relationship("AIAnalysis", backref="user_report", uselist=False)
 
@@ -92,7 +154,7 @@ class AIAnalysis(db.Model):
     risk_score = db.Column(db.Integer)
     risk_category = db.Column(db.String(50))
     suggested_specialty = db.Column(db.String(100))
-    full_analysis_json = db.Column(db.Text, nullable=False)
+    full_analysis_json = db.Column(CompressedText, nullable=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -129,6 +191,12 @@ class Report(db.Model):
 # ============================
 class Appointment(db.Model):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # keyset pages of a doctor's / patient's appointments, newest first
+        db.Index("ix_appointments_doctor_id_id", "doctor_id", "id"),
+        db.Index("ix_appointments_patient_id_id", "patient_id", "id"),
+        db.Index("ix_appointments_slot_id", "slot_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -139,7 +207,7 @@ class Appointment(db.Model):
     disease = db.Column(db.String(255))
     status = db.Column(db.String(50), default="requested")
 
-    ai_analysis = db.Column(db.Text)
+    ai_analysis = db.Column(CompressedText)
     report_files = db.Column(db.Text)
     report_names = db.Column(db.Text)
 
@@ -158,6 +226,11 @@ class Appointment(db.Model):
 # ============================
 class Notification(db.Model):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # inbox listing (keyset on created_at, id), unread-only and all
+        db.Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+        db.Index("ix_notifications_user_created", "user_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
@@ -165,3 +238,74 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ============================
+# STAGED NOTIFICATION MODEL
+# ============================
+class StagedNotification(db.Model):
+    """A notification waiting for the next batched write to `notifications`.
+
+    Committed with the event itself, so it survives a killed worker; moved
+    over by core.notifications.flush_notifications.
+    """
+    __tablename__ = "notification_staging"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    message = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ============================
+# NOTIFICATION COUNTER MODEL
+# ============================
+class NotificationCounter(db.Model):
+    """Unread count per user, kept in step with inserts / mark-as-read."""
+    __tablename__ = "notification_counters"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    unread = db.Column(db.Integer, nullable=False, default=0)
+
+
+# ============================
+# CHAT MESSAGE MODEL
+# ============================
+class ChatMessage(db.Model):
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        db.Index("ix_chat_messages_report_id_id", "report_id", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(db.Integer, nullable=False)
+    sender = db.Column(db.String(50), default="user")
+    message = db.Column(db.Text, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ============================
+# EMAIL OUTBOX MODEL
+# ============================
+class EmailOutbox(db.Model):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        db.Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    to = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(512))
+    body = db.Column(db.Text)
+    attachment_paths = db.Column(db.Text)   # JSON list
+    # Rows sharing a digest_key are sent together as one digest email
+    digest_key = db.Column(db.String(100), index=True)
+
+    status = db.Column(db.String(20), default="pending")   # pending / sending / sent / dead
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
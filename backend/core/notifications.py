@@ -1,15 +1,168 @@
-from core.database import db
-from core.models import Notification
+import os
+import logging
 from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from core.database import db
+from core.models import Notification, NotificationCounter, StagedNotification
+from core.outbox import enqueue_email
+from core.jobs import start_periodic_job
+
+log = logging.getLogger(__name__)
+
+# Notifications are staged in notification_staging and written to the inbox
+# in one batched insert per window; emails to a user are coalesced into one
+# digest per window. 0 disables both: everything is written / sent at once.
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv("NOTIFICATION_DIGEST_WINDOW", "300"))
+NOTIFICATION_FLUSH_BATCH = int(os.getenv("NOTIFICATION_FLUSH_BATCH", "5000"))
+
+
+def adjust_unread(user_id, delta):
+    """Add `delta` to a user's unread counter (caller commits)."""
+    if delta:
+        _upsert_counter(user_id, delta)
+
+
+def _upsert_counter(user_id, delta):
+    # A missing counter is seeded from the table (which already includes this
+    # change); an existing one is adjusted. One statement, so two workers
+    # creating the same user's counter can't collide on the primary key.
+    conn = db.session.connection()
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}.get(conn.dialect.name)
+    seed = (
+        db.select(db.func.count(Notification.id))
+        .where(Notification.user_id == user_id, Notification.is_read.is_(False))
+        .scalar_subquery()
+    )
+    if dialect is None:
+        # Portable fallback: update, then insert if there was nothing to update
+        updated = db.session.execute(
+            db.update(NotificationCounter)
+            .where(NotificationCounter.user_id == user_id)
+            .values(unread=NotificationCounter.unread + delta)
+        ).rowcount
+        if not updated:
+            db.session.execute(db.insert(NotificationCounter).values(user_id=user_id, unread=seed))
+        return
+
+    stmt = dialect.insert(NotificationCounter).values(user_id=user_id, unread=seed)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread": NotificationCounter.unread + delta}
+    ))
 
-def send_notification(user_id, message):
-    notif = Notification(
-        user_id=user_id,
-        message=message,
-        created_at=datetime.utcnow()
+
+def count_unread(user_id):
+    return (
+        db.session.query(db.func.count(Notification.id))
+        .filter(Notification.user_id == user_id, Notification.is_read.is_(False))
+        .scalar()
+    )
+
+
+def get_unread_count(user_id):
+    """Unread count for an existing user (callers check the user exists)."""
+    counter = db.session.get(NotificationCounter, user_id)
+    if counter is None:
+        # Users created before counters existed: compute once, then maintained
+        _upsert_counter(user_id, 0)
+        db.session.commit()
+        counter = db.session.get(NotificationCounter, user_id)
+    return counter.unread
+
+
+def mark_read(user_id, ids=None):
+    """Mark the given notifications (or all of them) read; returns how many changed."""
+    query = db.update(Notification).where(
+        Notification.user_id == user_id, Notification.is_read.is_(False)
     )
+    if ids is not None:
+        query = query.where(Notification.id.in_(ids))
 
-    db.session.add(notif)
+    changed = db.session.execute(query.values(is_read=True)).rowcount
+    adjust_unread(user_id, -changed)
     db.session.commit()
+    return changed
+
+
+def _write_notifications(rows):
+    """One executemany INSERT plus one counter update per user (caller commits)."""
+    db.session.execute(db.insert(Notification), rows)
+
+    per_user = {}
+    for row in rows:
+        if row["user_id"] is not None:
+            per_user[row["user_id"]] = per_user.get(row["user_id"], 0) + 1
+    for user_id, count in per_user.items():
+        adjust_unread(user_id, count)
+
 
-    print(f"📨 Notification → User {user_id}: {message}")
+def flush_notifications(batch_size=NOTIFICATION_FLUSH_BATCH):
+    """Move staged notifications into the inbox; returns how many moved.
+
+    Insert and delete commit together, so a failure leaves the batch staged
+    for the next run, and SKIP LOCKED keeps concurrent flushers apart.
+    """
+    staged = (
+        StagedNotification.query
+        .order_by(StagedNotification.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not staged:
+        db.session.rollback()
+        return 0
+
+    _write_notifications([
+        {"user_id": s.user_id, "message": s.message, "is_read": False, "created_at": s.created_at}
+        for s in staged
+    ])
+    db.session.execute(
+        db.delete(StagedNotification).where(StagedNotification.id.in_([s.id for s in staged]))
+    )
+    db.session.commit()
+    log.info("Flushed %d staged notifications", len(staged))
+    return len(staged)
+
+
+def drain_notifications():
+    while flush_notifications() >= NOTIFICATION_FLUSH_BATCH:
+        pass
+
+
+def start_notification_flusher(app):
+    return start_periodic_job(
+        app, "notification-flush", max(NOTIFICATION_DIGEST_WINDOW, 1), drain_notifications
+    )
+
+
+def send_notification(user_id, message, urgent=False):
+    """Record a notification for a user (commits).
+
+    Urgent ones go straight to the inbox; the rest are staged (one small
+    append-only row, durable) and reach the inbox with the next flush.
+    """
+    if urgent or NOTIFICATION_DIGEST_WINDOW <= 0:
+        _write_notifications([
+            {"user_id": user_id, "message": message, "is_read": False, "created_at": datetime.utcnow()}
+        ])
+    else:
+        db.session.add(StagedNotification(user_id=user_id, message=message))
+    db.session.commit()
+    log.debug("Notification -> user %s: %s", user_id, message)
+
+
+def send_user_email(user_id, to, subject, body, attachment_paths=None, urgent=False):
+    """Queue an email for a user, folded into that user's digest unless urgent.
+
+    All non-urgent emails for the same user that come due inside one window
+    go out as a single digest email (see core.outbox).
+    """
+    if urgent or NOTIFICATION_DIGEST_WINDOW <= 0:
+        return enqueue_email(to, subject, body, attachment_paths)
+
+    return enqueue_email(
+        to, subject, body, attachment_paths,
+        digest_key=f"user:{user_id}",
+        delay_seconds=NOTIFICATION_DIGEST_WINDOW
+    )
@@ -0,0 +1,182 @@
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+from core.database import db
+from core.models import EmailOutbox
+from core.email_service import send_batch
+from core.jobs import start_periodic_job
+
+log = logging.getLogger(__name__)
+
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_SECONDS = int(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+OUTBOX_MAX_BACKOFF_SECONDS = int(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "3600"))
+# A claimed ("sending") row whose worker died is picked up again after this
+OUTBOX_SENDING_LEASE_SECONDS = int(os.getenv("OUTBOX_SENDING_LEASE_SECONDS", "600"))
+
+
+def enqueue_email(to, subject, body, attachment_paths=None, digest_key=None, delay_seconds=0):
+    """Queue an email in the current DB transaction.
+
+    Nothing is sent here: the row is committed together with the caller's
+    changes and the outbox worker delivers it afterwards. Rows with the same
+    `digest_key` are merged into one email when the first of them is due.
+    """
+    row = EmailOutbox(
+        to=to,
+        subject=subject,
+        body=body,
+        attachment_paths=json.dumps(attachment_paths or []),
+        digest_key=digest_key,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow() + timedelta(seconds=delay_seconds),
+    )
+    db.session.add(row)
+    return row
+
+
+def backoff_delay(attempts):
+    return min(OUTBOX_BACKOFF_SECONDS * (2 ** (attempts - 1)), OUTBOX_MAX_BACKOFF_SECONDS)
+
+
+def group_rows(rows):
+    """Split rows into send groups: one per digest key, singletons otherwise."""
+    groups, by_key = [], {}
+    for row in rows:
+        if not row.digest_key:
+            groups.append([row])
+        elif row.digest_key in by_key:
+            by_key[row.digest_key].append(row)
+        else:
+            by_key[row.digest_key] = [row]
+            groups.append(by_key[row.digest_key])
+    return groups
+
+
+def build_group_message(group):
+    if len(group) == 1:
+        row = group[0]
+        return {
+            "to": row.to,
+            "subject": row.subject,
+            "body": row.body,
+            "attachment_paths": json.loads(row.attachment_paths or "[]"),
+        }
+
+    attachments = []
+    sections = []
+    for row in group:
+        sections.append(f"=== {row.subject} ===\n{(row.body or '').strip()}")
+        for p in json.loads(row.attachment_paths or "[]"):
+            if p not in attachments:
+                attachments.append(p)
+
+    return {
+        "to": group[0].to,
+        "subject": f"NextOpinion: {len(group)} new updates",
+        "body": f"You have {len(group)} new updates.\n\n" + "\n\n".join(sections),
+        "attachment_paths": attachments,
+    }
+
+
+def _claimable(now):
+    # pending rows, and claims whose lease ran out (worker died). A "sending"
+    # row with a live lease belongs to another worker: its row lock is gone
+    # after the claim commits, so SKIP LOCKED alone would not keep it out.
+    return db.or_(
+        EmailOutbox.status == "pending",
+        db.and_(EmailOutbox.status == "sending", EmailOutbox.next_attempt_at <= now)
+    )
+
+
+def deliver_pending(batch_size=OUTBOX_BATCH_SIZE):
+    """Send one batch of due emails. Returns how many rows were processed.
+
+    Rows are claimed first (status "sending", committed) so no row lock or
+    transaction is held while talking to SMTP; the outcome is written in a
+    second short transaction.
+    """
+    now = datetime.utcnow()
+
+    # SKIP LOCKED lets several workers claim from the outbox without overlap
+    rows = (
+        EmailOutbox.query
+        .filter(_claimable(now), EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    if not rows:
+        db.session.rollback()
+        return 0
+
+    # Pull in the rest of each due digest, even rows whose own time hasn't come
+    digest_keys = {row.digest_key for row in rows if row.digest_key}
+    if digest_keys:
+        seen = {row.id for row in rows}
+        rows += [
+            row for row in (
+                EmailOutbox.query
+                .filter(_claimable(now), EmailOutbox.digest_key.in_(digest_keys))
+                .order_by(EmailOutbox.id)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if row.id not in seen
+        ]
+
+    groups = group_rows(rows)
+    messages = [build_group_message(group) for group in groups]
+    claimed = [[(row.id, (row.attempts or 0) + 1) for row in group] for group in groups]
+
+    # Claim: attempts are counted here so a crash mid-send still uses one up
+    lease = now + timedelta(seconds=OUTBOX_SENDING_LEASE_SECONDS)
+    for row in rows:
+        row.status = "sending"
+        row.attempts = (row.attempts or 0) + 1
+        row.next_attempt_at = lease
+    db.session.commit()
+
+    # One pooled SMTP session for the whole batch, outside any transaction
+    errors = send_batch(messages)
+
+    sent_at = datetime.utcnow()
+    for ids, error in zip(claimed, errors):
+        if error is None:
+            db.session.execute(
+                db.update(EmailOutbox)
+                .where(EmailOutbox.id.in_([row_id for row_id, _ in ids]), EmailOutbox.status == "sending")
+                .values(status="sent", sent_at=sent_at, last_error=None)
+            )
+            continue
+        for row_id, attempts in ids:
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                values = {"status": "dead", "last_error": str(error)}
+                log.error("Outbox email %s dead-lettered after %s attempts: %s", row_id, attempts, error)
+            else:
+                values = {"status": "pending", "last_error": str(error),
+                          "next_attempt_at": sent_at + timedelta(seconds=backoff_delay(attempts))}
+            db.session.execute(
+                db.update(EmailOutbox)
+                .where(EmailOutbox.id == row_id, EmailOutbox.status == "sending")
+                .values(**values)
+            )
+
+    db.session.commit()
+    return len(rows)
+
+
+def drain_outbox():
+    # Keep going while full batches come back, then sleep until the next tick
+    while deliver_pending() >= OUTBOX_BATCH_SIZE:
+        pass
+
+
+def start_outbox_worker(app):
+    return start_periodic_job(app, "email-outbox", OUTBOX_POLL_SECONDS, drain_outbox)
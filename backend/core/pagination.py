@@ -0,0 +1,7 @@
+def page_limit(args, default, maximum):
+    """`?limit=` clamped to 1..maximum (missing or non-numeric → default).
+
+    Keyset endpoints compare the page length with the limit to decide whether
+    there is a next page, so a limit of 0 or below must never reach them.
+    """
+    return max(1, min(args.get("limit", default, type=int), maximum))
@@ -0,0 +1,194 @@
+import os
+import json
+import logging
+import time
+import select
+import threading
+from collections import defaultdict, deque
+
+log = logging.getLogger(__name__)
+
+# Which backend fans messages out:
+#   "local"    → in-process only (single worker, tests)
+#   "postgres" → LISTEN/NOTIFY on DATABASE_URL, reaches every worker
+# Unset: "postgres" when more than one worker shares a Postgres database
+# (WEB_CONCURRENCY, exported by gunicorn.conf.py), otherwise "local". With
+# "local" under several workers a message only reaches streams on the worker
+# that received it; the others notice on their next heartbeat.
+def _default_backend():
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    on_postgres = os.getenv("DATABASE_URL", "").startswith(("postgres://", "postgresql"))
+    return "postgres" if workers > 1 and on_postgres else "local"
+
+
+PUBSUB_BACKEND = (os.getenv("PUBSUB_BACKEND") or _default_backend()).lower()
+
+# Hard cap on open subscriptions per process (each one is an open SSE / long-poll)
+MAX_SUBSCRIBERS = int(os.getenv("PUBSUB_MAX_SUBSCRIBERS", "100"))
+# Undelivered messages kept per subscriber before the oldest are dropped
+SUBSCRIBER_BUFFER = int(os.getenv("PUBSUB_SUBSCRIBER_BUFFER", "50"))
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    """A bounded mailbox for one listener on one channel."""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self._queue = deque(maxlen=SUBSCRIBER_BUFFER)
+        self._event = threading.Event()
+
+    def _push(self, message):
+        self._queue.append(message)
+        self._event.set()
+
+    def get(self, timeout=None):
+        """Wait up to `timeout` seconds; return all pending messages (maybe [])."""
+        if not self._queue:
+            self._event.wait(timeout)
+        self._event.clear()
+        messages = []
+        while self._queue:
+            messages.append(self._queue.popleft())
+        return messages
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalBroker:
+    """In-process pub/sub. Also the stand-in for the cross-worker backend in tests."""
+
+    def __init__(self, max_subscribers=MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._subs = defaultdict(set)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers(f"Subscriber limit reached ({self.max_subscribers})")
+            sub = Subscription(self, channel)
+            self._subs[channel].add(sub)
+            self._count += 1
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subs.get(sub.channel)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not subs:
+                    del self._subs[sub.channel]
+
+    def subscriber_count(self):
+        return self._count
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subs = list(self._subs.get(channel, ()))
+        for sub in subs:
+            sub._push(message)
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+
+class PostgresBroker(LocalBroker):
+    """Cross-worker pub/sub over Postgres LISTEN/NOTIFY.
+
+    One background connection per process LISTENs and fans notifications out
+    to the local subscribers; publishing is a single pg_notify().
+    Payloads must stay small (Postgres caps them at 8000 bytes).
+    """
+
+    PG_CHANNEL = "nextopinion_pubsub"
+
+    def __init__(self, dsn, max_subscribers=MAX_SUBSCRIBERS):
+        super().__init__(max_subscribers)
+        self.dsn = dsn
+        self._listener = None
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    def _listen(self):
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                conn.cursor().execute(f"LISTEN {self.PG_CHANNEL};")
+                while True:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        note = conn.notifies.pop(0)
+                        data = json.loads(note.payload)
+                        self._deliver(data["channel"], data["message"])
+            except Exception as e:
+                log.warning("Pub/sub listener error, reconnecting: %s", e)
+                time.sleep(1)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def subscribe(self, channel):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(
+                        target=self._listen, name="pubsub-listener", daemon=True
+                    )
+                    self._listener.start()
+        return super().subscribe(channel)
+
+    def publish(self, channel, message):
+        payload = json.dumps({"channel": channel, "message": message})
+        with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.closed:
+                    self._publish_conn = self._connect()
+                self._publish_conn.cursor().execute(
+                    "SELECT pg_notify(%s, %s)", (self.PG_CHANNEL, payload)
+                )
+            except Exception as e:
+                log.warning("Pub/sub publish failed: %s", e)
+                self._publish_conn = None
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if PUBSUB_BACKEND == "postgres":
+                    # libpq wants a plain postgresql:// URI, not SQLAlchemy's
+                    dsn = os.getenv("DATABASE_URL", "").replace("+psycopg2", "")
+                    _broker = PostgresBroker(dsn)
+                else:
+                    _broker = LocalBroker()
+    return _broker
@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import timedelta, timezone
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from core.database import db
+from core.models import Slot
+
+# Each worker keeps its own copy; rebuild from the table after this many
+# seconds so writes made by other workers show up. The slots table stays the
+# source of truth (claim_slot still decides who gets a slot).
+SLOT_INDEX_TTL = int(os.getenv("SLOT_INDEX_TTL", "30"))
+
+_indexes = {}           # doctor_id → DoctorSlotIndex
+_registry_lock = threading.Lock()
+
+
+def _aware(value):
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class DoctorSlotIndex:
+    """One doctor's slots as a start-sorted interval list.
+
+    `reach[i]` is the latest end among the first i+1 intervals, so "does
+    [start, end) overlap anything?" is one bisect plus one lookup, even when
+    old data contains overlapping slots.
+    """
+
+    def __init__(self, doctor_id, rows):
+        self.doctor_id = doctor_id
+        self.lock = threading.Lock()
+        self.loaded_at = time.monotonic()
+        rows = sorted(((_aware(s), _aware(e), i, bool(b)) for i, s, e, b in rows if s and e),
+                      key=lambda r: r[0])
+        self.starts = [r[0] for r in rows]
+        self.entries = rows            # (start, end, slot_id, is_booked)
+        self.reach = []
+        self._rebuild_reach(0)
+
+    def _rebuild_reach(self, pos):
+        del self.reach[pos:]
+        latest = self.reach[-1] if self.reach else None
+        for entry in self.entries[pos:]:
+            latest = entry[1] if latest is None or entry[1] > latest else latest
+            self.reach.append(latest)
+
+    def _position(self, slot_id, start):
+        lo, hi = bisect_left(self.starts, start), bisect_right(self.starts, start)
+        for pos in range(lo, hi):
+            if self.entries[pos][2] == slot_id:
+                return pos
+        return None
+
+    def overlapping(self, start, end):
+        """First slot overlapping [start, end), or None. O(log n) when free."""
+        start, end = _aware(start), _aware(end)
+        with self.lock:
+            pos = bisect_left(self.starts, end)
+            if pos == 0 or self.reach[pos - 1] <= start:
+                return None
+            # Something before `pos` ends after `start`: walk back to it
+            for i in range(pos - 1, -1, -1):
+                if self.entries[i][1] > start:
+                    return self.entries[i]
+        return None
+
+    def next_free_window(self, after, minutes):
+        """Earliest run of back-to-back free slots starting at or after `after`
+        that lasts at least `minutes`; returns [(start, end, slot_id), ...] or None.
+        """
+        after, needed = _aware(after), timedelta(minutes=minutes)
+        with self.lock:
+            run = []
+            for i in range(bisect_left(self.starts, after), len(self.entries)):
+                start, end, slot_id, booked = self.entries[i]
+                if booked or (run and start != run[-1][1]):
+                    run = []
+                if booked:
+                    continue
+                run.append((start, end, slot_id))
+                if run[-1][1] - run[0][0] >= needed:
+                    return run
+        return None
+
+    def add(self, slot_id, start, end, is_booked=False):
+        start, end = _aware(start), _aware(end)
+        with self.lock:
+            if self._position(slot_id, start) is not None:
+                return  # loaded after the insert already
+            pos = bisect_right(self.starts, start)
+            self.starts.insert(pos, start)
+            self.entries.insert(pos, (start, end, slot_id, is_booked))
+            self._rebuild_reach(pos)
+
+    def set_booked(self, slot_id, start, is_booked):
+        with self.lock:
+            pos = self._position(slot_id, _aware(start))
+            if pos is not None:
+                s, e, i, _ = self.entries[pos]
+                self.entries[pos] = (s, e, i, is_booked)
+
+
+def _load(doctor_id):
+    rows = db.session.execute(
+        db.select(Slot.id, Slot.start, Slot.end, Slot.is_booked)
+        .where(Slot.doctor_id == doctor_id)
+    ).all()
+    return DoctorSlotIndex(doctor_id, rows)
+
+
+def get_index(doctor_id):
+    """The doctor's index, (re)built from the slots table when missing or stale."""
+    index = _indexes.get(doctor_id)
+    if index is None or time.monotonic() - index.loaded_at > SLOT_INDEX_TTL:
+        index = _load(doctor_id)
+        with _registry_lock:
+            _indexes[doctor_id] = index
+    return index
+
+
+def invalidate(doctor_id=None):
+    with _registry_lock:
+        if doctor_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(doctor_id, None)
+
+
+# -----------------------------------------------------------
+# Keep indexes in step with committed writes
+# -----------------------------------------------------------
+def on_commit(fn, *args):
+    """Run fn(*args) after the current transaction commits (dropped on rollback)."""
+    db.session.info.setdefault("slot_index_updates", []).append((fn, args))
+
+
+def index_added(slot):
+    on_commit(_apply_added, slot.doctor_id, slot.id, slot.start, slot.end, bool(slot.is_booked))
+
+
+def index_booked(doctor_id, slot_id, start, is_booked):
+    on_commit(_apply_booked, doctor_id, slot_id, start, is_booked)
+
+
+def _apply_added(doctor_id, slot_id, start, end, is_booked):
+    index = _indexes.get(doctor_id)
+    if index is not None:
+        index.add(slot_id, start, end, is_booked)
+
+
+def _apply_booked(doctor_id, slot_id, start, is_booked):
+    index = _indexes.get(doctor_id)
+    if index is not None:
+        index.set_booked(slot_id, start, is_booked)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_index_updates(session):
+    for fn, args in session.info.pop("slot_index_updates", []):
+        fn(*args)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_index_updates(session):
+    session.info.pop("slot_index_updates", None)
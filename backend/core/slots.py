@@ -0,0 +1,346 @@
+import os
+import re
+import logging
+from datetime import datetime, date, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from core.database import db
+from core.pagination import page_limit
+from core.models import Doctor, Slot, SlotArchive, Appointment
+from core.jobs import start_periodic_job
+from core.slot_index import DoctorSlotIndex, get_index, invalidate, on_commit
+from core.versions import bump, doctor_slots_key
+
+log = logging.getLogger(__name__)
+
+# Bare "HH:MM" times from the dashboard are interpreted in this zone
+SLOT_TIMEZONE = ZoneInfo(os.getenv("SLOT_TIMEZONE", "UTC"))
+
+DEFAULT_SLOT_LIMIT = 200
+MAX_SLOT_LIMIT = 1000
+# Per-doctor cap for "earliest free slots" lookups that span many doctors
+MAX_SLOTS_PER_DOCTOR = 10
+
+# Free slots that ended more than this long ago are moved to slots_archive
+SLOT_ARCHIVE_GRACE_HOURS = int(os.getenv("SLOT_ARCHIVE_GRACE_HOURS", "24"))
+SLOT_ARCHIVE_INTERVAL = int(os.getenv("SLOT_ARCHIVE_INTERVAL", "3600"))
+SLOT_ARCHIVE_BATCH = 1000
+
+# Upper bound on slots generated by one recurrence rule (a year of 15-minute
+# slots, 8 hours a day, every day is ~11,700)
+MAX_BULK_SLOTS = int(os.getenv("MAX_BULK_SLOTS", "20000"))
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+_TIME_ONLY = re.compile(r"^\d{1,2}:\d{2}(:\d{2})?$")
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def parse_slot_time(value, on_date=None):
+    """Accept ISO datetimes, or a bare "HH:MM" (on `on_date`, default today).
+
+    Naive values are read in SLOT_TIMEZONE; the result is always UTC.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif not isinstance(value, str):
+        # e.g. a number in the JSON body: a client error, not a 500
+        raise ValueError(f"Not a datetime or HH:MM string: {value!r}")
+    elif _TIME_ONLY.match(value):
+        if isinstance(on_date, str):
+            on_date = date.fromisoformat(on_date)
+        elif on_date is not None and not isinstance(on_date, date):
+            raise ValueError(f"Not an ISO date: {on_date!r}")
+        on_date = on_date or datetime.now(SLOT_TIMEZONE).date()
+        parsed = datetime.combine(on_date, time.fromisoformat(value.zfill(5)))
+    else:
+        parsed = datetime.fromisoformat(value)
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=SLOT_TIMEZONE)
+    return parsed.astimezone(timezone.utc)
+
+
+def as_aware(value):
+    # Postgres hands back TIMESTAMPTZ as aware datetimes; SQLite drops the zone
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def iso(value):
+    return as_aware(value).isoformat() if value else None
+
+
+def format_slot_range(slot):
+    if not slot or not slot.start:
+        return "-"
+    start = as_aware(slot.start).astimezone(SLOT_TIMEZONE)
+    end = as_aware(slot.end).astimezone(SLOT_TIMEZONE) if slot.end else None
+    text = start.strftime("%Y-%m-%d %H:%M")
+    if end:
+        text += " - " + (end.strftime("%H:%M") if end.date() == start.date() else end.strftime("%Y-%m-%d %H:%M"))
+    return f"{text} ({start.tzname()})"
+
+
+def serialize_slot(s):
+    return {
+        "id": s.id,
+        "start": iso(s.start),
+        "end": iso(s.end),
+        "is_booked": s.is_booked
+    }
+
+
+def slot_window_query(doctor_id, args, only_free=False):
+    """Slots for a doctor in a time window, ordered by start.
+
+    Query args: from / to (ISO datetimes, default from = now), limit.
+    Served by the (doctor_id, is_booked, start) index.
+    """
+    start_from = parse_slot_time(args.get("from")) or utcnow()
+    start_to = parse_slot_time(args.get("to"))
+    limit = page_limit(args, DEFAULT_SLOT_LIMIT, MAX_SLOT_LIMIT)
+
+    query = Slot.query.filter(Slot.doctor_id == doctor_id, Slot.start >= start_from)
+    if only_free:
+        query = query.filter(Slot.is_booked.is_(False))
+    if start_to:
+        query = query.filter(Slot.start < start_to)
+
+    return query.order_by(Slot.start).limit(limit)
+
+
+def earliest_free_slots(doctor_ids, per_doctor=3, after=None):
+    """The first `per_doctor` free slots of each doctor, in one query.
+
+    ROW_NUMBER() per doctor over the (doctor_id, is_booked, start) index;
+    returns {doctor_id: [slot dict, ...]} with an entry for every id asked for.
+    """
+    doctor_ids = sorted({int(i) for i in doctor_ids if i is not None})
+    found = {doctor_id: [] for doctor_id in doctor_ids}
+    if not doctor_ids:
+        return found
+
+    ranked = (
+        db.select(
+            Slot.id, Slot.doctor_id, Slot.start, Slot.end,
+            db.func.row_number().over(partition_by=Slot.doctor_id, order_by=Slot.start).label("rank")
+        )
+        .where(
+            Slot.doctor_id.in_(doctor_ids),
+            Slot.is_booked.is_(False),
+            Slot.start >= (after or utcnow())
+        )
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(ranked.c.id, ranked.c.doctor_id, ranked.c.start, ranked.c.end)
+        .where(ranked.c.rank <= per_doctor)
+        .order_by(ranked.c.doctor_id, ranked.c.start)
+    ).all()
+
+    for row in rows:
+        found[row.doctor_id].append({"id": row.id, "start": iso(row.start), "end": iso(row.end)})
+    return found
+
+
+def attach_next_slots(doctors, per_doctor=3):
+    """Add "next_slots" to matcher results (dicts with a DB "id") in one query."""
+    available = earliest_free_slots([d.get("id") for d in doctors], per_doctor)
+    for d in doctors:
+        d["next_slots"] = available.get(d.get("id"), [])
+    return doctors
+
+
+def _weekday(value):
+    if isinstance(value, int) and 0 <= value <= 6:
+        return value
+    name = str(value).strip().lower()[:3]
+    if name not in WEEKDAYS:
+        raise ValueError(f"Unknown weekday: {value}")
+    return WEEKDAYS.index(name)
+
+
+def _rule_date(value, field):
+    if not isinstance(value, str):
+        raise ValueError(f"{field}: expected an ISO date string")
+    return date.fromisoformat(value)
+
+
+def _rule_time(value, field):
+    if not isinstance(value, str):
+        raise ValueError(f"{field}: expected an HH:MM string")
+    return time.fromisoformat(value.zfill(5))
+
+
+def _rule_zone(value):
+    try:
+        return ZoneInfo(value)
+    except (TypeError, ValueError, ZoneInfoNotFoundError):
+        raise ValueError(f"Unknown timezone: {value!r}")
+
+
+def expand_recurrence(rule):
+    """Expand a recurrence rule into sorted (start, end) UTC pairs.
+
+    rule = {
+        "from_date": "2025-01-01", "to_date": "2025-12-31",   # inclusive
+        "weekdays": ["mon", "wed", "fri"],                    # default: every day
+        "start_time": "09:00", "end_time": "17:00",           # daily hours
+        "slot_minutes": 15,
+        "breaks": [["13:00", "14:00"]],                       # optional
+        "exclude_dates": ["2025-12-25"],                      # optional
+        "timezone": "Asia/Kolkata",                           # default SLOT_TIMEZONE
+    }
+    """
+    try:
+        tz = _rule_zone(rule["timezone"]) if rule.get("timezone") else SLOT_TIMEZONE
+        first = _rule_date(rule["from_date"], "from_date")
+        last = _rule_date(rule["to_date"], "to_date")
+        day_start = _rule_time(rule["start_time"], "start_time")
+        day_end = _rule_time(rule["end_time"], "end_time")
+        length = timedelta(minutes=int(rule.get("slot_minutes", 30)))
+
+        weekdays = {_weekday(d) for d in rule.get("weekdays") or range(7)}
+        excluded = {_rule_date(d, "exclude_dates") for d in rule.get("exclude_dates") or []}
+        breaks = [(_rule_time(a, "breaks"), _rule_time(b, "breaks"))
+                  for a, b in rule.get("breaks") or []]
+    except TypeError as e:
+        # wrong JSON shapes (a number where a list belongs, ...)
+        raise ValueError(f"Malformed recurrence rule: {e}")
+
+    if last < first:
+        raise ValueError("to_date is before from_date")
+    if day_end <= day_start:
+        raise ValueError("end_time must be after start_time")
+    if length <= timedelta(0):
+        raise ValueError("slot_minutes must be positive")
+
+    # One day's pattern of local (start, end) times, reused for every date
+    pattern = []
+    cursor = datetime.combine(first, day_start)
+    stop = datetime.combine(first, day_end)
+    while cursor + length <= stop:
+        begin, finish = cursor.time(), (cursor + length).time()
+        if not any(begin < b_end and b_start < finish for b_start, b_end in breaks):
+            pattern.append((begin, finish))
+        cursor += length
+
+    slots = []
+    day = first
+    while day <= last:
+        if day.weekday() in weekdays and day not in excluded:
+            for begin, finish in pattern:
+                slots.append((
+                    datetime.combine(day, begin, tz).astimezone(timezone.utc),
+                    datetime.combine(day, finish, tz).astimezone(timezone.utc),
+                ))
+                if len(slots) > MAX_BULK_SLOTS:
+                    raise ValueError(f"Rule expands to more than {MAX_BULK_SLOTS} slots")
+        day += timedelta(days=1)
+
+    return slots
+
+
+def lock_doctor_slots(doctor_id):
+    """Hold the doctor's row lock until the transaction ends, so concurrent
+    slot adds for one doctor (from any worker) check and insert in turn."""
+    db.session.execute(db.select(Doctor.id).where(Doctor.id == doctor_id).with_for_update())
+
+
+def _stored_slots(doctor_id, candidates):
+    # The doctor's slots in the candidates' overall span, read from the table
+    rows = db.session.execute(
+        db.select(Slot.id, Slot.start, Slot.end, Slot.is_booked).where(
+            Slot.doctor_id == doctor_id,
+            Slot.start < max(end for _, end in candidates),
+            Slot.end > min(start for start, _ in candidates),
+        )
+    ).all()
+    return DoctorSlotIndex(doctor_id, rows)
+
+
+def first_overlap(doctor_id, start, end):
+    """The existing slot (start, end, id, is_booked) overlapping [start, end),
+    or None. Same locking and checks as find_overlaps."""
+    lock_doctor_slots(doctor_id)
+    return (get_index(doctor_id).overlapping(start, end)
+            or _stored_slots(doctor_id, [(start, end)]).overlapping(start, end))
+
+
+def find_overlaps(doctor_id, candidates):
+    """Split (start, end) candidates into (free, clashing with existing slots).
+
+    Call inside the transaction that inserts the free ones: it takes the
+    doctor's row lock first. The cached interval index rejects clashes
+    without a query; anything it reports free is confirmed against the table,
+    since the index can be SLOT_INDEX_TTL seconds behind other workers.
+    """
+    lock_doctor_slots(doctor_id)
+    index = get_index(doctor_id)
+    free, clashing = [], []
+    for start, end in candidates:
+        (clashing if index.overlapping(start, end) else free).append((start, end))
+
+    if free:
+        stored = _stored_slots(doctor_id, free)
+        confirmed = []
+        for start, end in free:
+            (clashing if stored.overlapping(start, end) else confirmed).append((start, end))
+        free = confirmed
+    clashing.sort()
+    return free, clashing
+
+
+def create_slots_bulk(doctor_id, candidates):
+    """Insert all candidates with one executemany INSERT; caller commits."""
+    if candidates:
+        db.session.execute(db.insert(Slot), [
+            {"doctor_id": doctor_id, "start": start, "end": end, "is_booked": False}
+            for start, end in candidates
+        ])
+        # executemany gives us no ids: reload this doctor's index on next use
+        on_commit(invalidate, doctor_id)
+        bump(doctor_slots_key(doctor_id))
+    return len(candidates)
+
+
+def archive_expired_slots():
+    """Move free slots that are long over out of the hot slots table."""
+    cutoff = utcnow() - timedelta(hours=SLOT_ARCHIVE_GRACE_HOURS)
+    total = 0
+    while True:
+        expired = (
+            Slot.query
+            .filter(Slot.is_booked.is_(False), Slot.end < cutoff)
+            # cancelled appointments still point at their old slot
+            .filter(~db.exists().where(Appointment.slot_id == Slot.id))
+            .limit(SLOT_ARCHIVE_BATCH)
+            .all()
+        )
+        if not expired:
+            break
+
+        db.session.execute(db.insert(SlotArchive), [
+            {"id": s.id, "doctor_id": s.doctor_id, "start": s.start, "end": s.end,
+             "is_booked": s.is_booked, "archived_at": utcnow()}
+            for s in expired
+        ])
+        db.session.execute(db.delete(Slot).where(Slot.id.in_([s.id for s in expired])))
+        bump(*{doctor_slots_key(s.doctor_id) for s in expired})
+        db.session.commit()
+        total += len(expired)
+
+    if total:
+        invalidate()
+        log.info("Archived %d expired slots", total)
+    return total
+
+
+def start_slot_archiver(app):
+    return start_periodic_job(app, "slot-archiver", SLOT_ARCHIVE_INTERVAL, archive_expired_slots)
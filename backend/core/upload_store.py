@@ -0,0 +1,61 @@
+import os
+import logging
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+# Uploaded reports are kept on disk only so they can be attached to the
+# doctor's email / downloaded later. Parsing never reads them back.
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", tempfile.gettempdir())
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("UPLOAD_WRITERS", "2")),
+                               thread_name_prefix="upload-writer")
+_pending = {}
+_lock = threading.Lock()
+
+# Simple counters so we can see how much upload I/O each request costs
+stats = {"files_written": 0, "bytes_written": 0}
+
+
+def upload_path(filename):
+    return os.path.join(UPLOAD_DIR, filename)
+
+
+def _write(path, data):
+    try:
+        with open(path, "wb") as f:
+            f.write(data)
+        with _lock:
+            stats["files_written"] += 1
+            stats["bytes_written"] += len(data)
+    finally:
+        with _lock:
+            _pending.pop(path, None)
+
+
+def persist_async(filename, data):
+    """Queue the upload bytes for writing and return the final path right away.
+
+    Every upload gets its own stored name (uuid prefix, like chunked uploads),
+    so two reports with the same filename never overwrite each other.
+    """
+    path = upload_path(f"{uuid.uuid4().hex}_{os.path.basename(filename)}")
+    with _lock:
+        _pending[path] = _executor.submit(_write, path, bytes(data))
+    return path
+
+
+def wait_for(path, timeout=30):
+    """Block until a queued write for `path` has landed (no-op if nothing is pending)."""
+    with _lock:
+        future = _pending.get(path)
+    if future is not None:
+        try:
+            future.result(timeout=timeout)
+        except Exception as e:
+            log.error("Upload write failed for %s: %s", path, e)
+    return os.path.exists(path)
@@ -0,0 +1,150 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from core.database import db
+from core.models import Appointment, ResourceVersion, Slot
+
+# Per-resource version counters for conditional GETs. Every write that can
+# change a listing bumps its counter in the same transaction; a poll whose
+# ETag still matches is answered with 304 after one primary-key lookup.
+#
+#   doctor_appts:<doctor_id>     GET /doctor/<id>/appointments
+#   patient_appts:<patient_id>   GET /patient/<id>/appointments
+#   doctor_slots:<doctor_id>     GET /doctor/<id>/slots
+
+
+def doctor_appts_key(doctor_id):
+    return f"doctor_appts:{doctor_id}"
+
+
+def patient_appts_key(patient_id):
+    return f"patient_appts:{patient_id}"
+
+
+def doctor_slots_key(doctor_id):
+    return f"doctor_slots:{doctor_id}"
+
+
+def bump_versions(conn, keys):
+    """Increment the counters for `keys` (creating them at 1) on this connection."""
+    keys = sorted({k for k in keys if k and not k.endswith(":None")})
+    if not keys:
+        return
+
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}.get(conn.dialect.name)
+    now = datetime.utcnow()
+    if dialect is None:
+        # Portable fallback: update, then insert whatever did not exist yet
+        for key in keys:
+            updated = conn.execute(
+                db.update(ResourceVersion).where(ResourceVersion.key == key)
+                .values(version=ResourceVersion.version + 1, updated_at=now)
+            ).rowcount
+            if not updated:
+                conn.execute(db.insert(ResourceVersion).values(key=key, version=1, updated_at=now))
+        return
+
+    stmt = dialect.insert(ResourceVersion).values(
+        [{"key": key, "version": 1, "updated_at": now} for key in keys]
+    )
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.key],
+        set_={"version": ResourceVersion.version + 1, "updated_at": now}
+    ))
+
+
+def bump(*keys):
+    """Bump counters inside the current session's transaction (for Core writes
+    that the flush hook below cannot see)."""
+    bump_versions(db.session.connection(), keys)
+
+
+def _history_values(obj, attr):
+    history = db.inspect(obj).attrs[attr].history
+    return list(history.added or []) + list(history.deleted or []) + list(history.unchanged or [])
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session, flush_context):
+    keys = set()
+    moved_slots = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Appointment):
+            # old and new owners both see the change (e.g. a reassigned doctor)
+            keys.update(doctor_appts_key(d) for d in _history_values(obj, "doctor_id"))
+            keys.update(patient_appts_key(p) for p in _history_values(obj, "patient_id"))
+        elif isinstance(obj, Slot):
+            keys.update(doctor_slots_key(d) for d in _history_values(obj, "doctor_id"))
+            state = db.inspect(obj)
+            if obj in session.dirty and (state.attrs.start.history.has_changes()
+                                         or state.attrs.end.history.has_changes()):
+                moved_slots.add(obj.id)
+
+    if not keys and not moved_slots:
+        return
+
+    conn = session.connection()
+    if moved_slots:
+        for doctor_id, patient_id in conn.execute(
+            db.select(Appointment.doctor_id, Appointment.patient_id)
+            .where(Appointment.slot_id.in_(moved_slots))
+        ):
+            keys.update((doctor_appts_key(doctor_id), patient_appts_key(patient_id)))
+    bump_versions(conn, keys)
+
+
+def current_versions(keys):
+    rows = db.session.execute(
+        db.select(ResourceVersion.key, ResourceVersion.version, ResourceVersion.updated_at)
+        .where(ResourceVersion.key.in_(keys))
+    ).all()
+    found = {r.key: r for r in rows}
+    versions = [found[k].version if k in found else 0 for k in keys]
+    stamps = [found[k].updated_at for k in keys if k in found and found[k].updated_at]
+    return versions, (max(stamps) if stamps else None)
+
+
+def conditional(keys_for, time_bucket=None):
+    """Weak ETag for a GET view, answering 304 when If-None-Match still matches.
+
+    keys_for(**view_args) names the version counters the response depends on.
+    The ETag also covers the query string (page, window), and, for views
+    whose output drifts with the clock (slots "from now"), a time bucket.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            keys = keys_for(**kwargs)
+            versions, last_modified = current_versions(keys)
+
+            seed = [request.full_path] + [f"{k}={v}" for k, v in zip(keys, versions)]
+            if time_bucket:
+                seed.append(str(int(time.time() // time_bucket)))
+            etag = hashlib.sha1("|".join(seed).encode()).hexdigest()[:20]
+            if last_modified is not None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+
+            # Only the ETag decides: Last-Modified has one-second resolution,
+            # so If-Modified-Since alone would hide a write made in the same
+            # second as the previous response
+            unchanged = bool(request.if_none_match) and request.if_none_match.contains_weak(etag)
+            if unchanged:
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
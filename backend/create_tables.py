@@ -1,10 +1,11 @@
 # create_tables.py
-from app import app           # your Flask app
-from core.database import db  # SQLAlchemy instance
-# make sure all models are imported so SQLAlchemy knows about them
-import core.models            # noqa: F401
+# Creates / upgrades the schema by applying every Alembic migration
+# (same as running `alembic upgrade head` from this directory).
+import os
+from alembic import command
+from alembic.config import Config
 
-with app.app_context():
-    print("Creating all tables...")
-    db.create_all()
-    print("✅ Tables created (if they didn't exist).")
+if __name__ == "__main__":
+    print("Applying migrations...")
+    command.upgrade(Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")), "head")
+    print("✅ Schema is up to date.")
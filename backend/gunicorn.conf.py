@@ -0,0 +1,65 @@
+# gunicorn.conf.py
+# Production server: the app is imported and warmed up once in the master,
+# then forked, so every worker shares the SDKs, the doctor catalogue and the
+# term cache copy-on-write instead of loading its own copy.
+#   gunicorn app:app            (this file is picked up automatically)
+# Background jobs do not run here; start outbox_worker.py separately.
+# Chat streams (SSE / long-poll) hold a thread for their whole life, so the
+# default worker class is gthread: with sync workers (threads=1) a host can
+# only keep `workers` streams open. Size GUNICORN_THREADS for the expected
+# number of concurrent streams per worker (or use an async worker class).
+# With more than one worker, chat pub/sub defaults to Postgres LISTEN/NOTIFY
+# (core/pubsub.py) so a message reaches streams held by the other workers.
+# For /metrics across all workers, export PROMETHEUS_MULTIPROC_DIR (an empty,
+# writable directory) before starting gunicorn.
+import gc
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_CONCURRENCY", "8"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+# Read by core/pubsub.py to pick the cross-worker backend
+os.environ["WEB_CONCURRENCY"] = str(workers)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# GUNICORN_PRELOAD=0 imports and warms the app in each worker instead (more
+# memory, but code reloads with a HUP); see measure_worker_rss.py
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app import, before the first fork
+    if not preload_app:
+        return
+    from app import app, warmup
+
+    warmup(app)
+    # Move everything allocated so far out of the collector's generations:
+    # a full collection in a worker would otherwise write to the GC header of
+    # every shared object and un-share the pages it touched
+    gc.collect()
+    gc.freeze()
+    server.log.info("Warmup finished, %d objects frozen", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    from app import app
+    from core.database import db
+
+    # Never reuse a pooled connection the master might have opened
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        from app import app, warmup
+
+        warmup(app)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
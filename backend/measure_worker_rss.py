@@ -0,0 +1,92 @@
+# measure_worker_rss.py
+# Starts gunicorn (gunicorn.conf.py) with N workers, once with each worker
+# loading and warming the app itself and once preloaded + warmed in the master,
+# then reports per-worker memory from /proc/<pid>/smaps_rollup (Linux only):
+#   RSS   resident pages, shared ones counted in full for every worker
+#   PSS   shared pages split between the processes sharing them
+#   USS   pages private to the worker (what killing it would free)
+#   python measure_worker_rss.py [--workers 8]
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SETTLE_SECONDS = 3
+
+
+def smaps(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                found.append(int(entry))
+    return found
+
+
+def run(preload, workers, port):
+    env = dict(os.environ, GUNICORN_PRELOAD="1" if preload else "0",
+               WEB_CONCURRENCY=str(workers), GUNICORN_BIND=f"127.0.0.1:{port}")
+    env.setdefault("DATABASE_URL", "sqlite://")
+    log = open(os.path.join(tempfile.gettempdir(), f"gunicorn-{'preload' if preload else 'lazy'}.log"), "w")
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app"],
+                            cwd=HERE, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.time() + 120
+        while True:
+            warmed = open(log.name).read().count("Warmup done")
+            if warmed >= (1 if preload else workers) and len(children(proc.pid)) == workers:
+                break
+            if proc.poll() is not None or time.time() > deadline:
+                sys.exit(f"❌ gunicorn did not come up, see {log.name}")
+            time.sleep(0.2)
+        time.sleep(SETTLE_SECONDS)
+        master = smaps(proc.pid)
+        per_worker = [smaps(pid) for pid in children(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+        log.close()
+    return master, per_worker
+
+
+def report(label, master, per_worker):
+    n = len(per_worker)
+    avg = {k: sum(w[k] for w in per_worker) / n / 1024 for k in ("rss", "pss", "uss")}
+    total_pss = (master["pss"] + sum(w["pss"] for w in per_worker)) / 1024
+    print(f"{label:<26} worker RSS {avg['rss']:6.1f} MB  PSS {avg['pss']:6.1f} MB  "
+          f"USS {avg['uss']:6.1f} MB   total PSS (master + {n}) {total_pss:7.1f} MB")
+    return total_pss
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args()
+
+    before = report("per-worker warmup", *run(False, args.workers, args.port))
+    after = report("preload + pre-fork warmup", *run(True, args.workers, args.port))
+    print(f"\n💾 {before - after:.1f} MB less in total ({(1 - after / before) * 100:.0f}%)")
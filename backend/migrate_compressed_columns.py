@@ -0,0 +1,70 @@
+# migrate_compressed_columns.py
+# Optional follow-up for the CompressedText columns. `alembic upgrade head`
+# (revision 0003) converts the old TEXT columns to BYTEA, tagging every row as
+# "raw" (codec byte 0) so the app can read them immediately; this re-encodes
+# those raw rows with the configured codec in small batches, to get the space
+# back. Safe to re-run, and to run while the app is serving.
+from sqlalchemy import text, bindparam, LargeBinary
+from app import app
+from core.database import db
+from core.compression import compress_text, CODEC_RAW
+
+COLUMNS = [
+    ("ai_analyses", "full_analysis_json"),
+    ("appointments", "ai_analysis"),
+]
+BATCH_SIZE = 500
+
+
+def column_type(table, column):
+    return db.session.execute(text(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_name = :t AND column_name = :c"
+    ), {"t": table, "c": column}).scalar()
+
+
+def recompress_column(table, column):
+    select_batch = text(
+        f"SELECT id, {column} FROM {table} "
+        f"WHERE {column} IS NOT NULL AND get_byte({column}, 0) = {CODEC_RAW} AND id > :last_id "
+        f"ORDER BY id LIMIT {BATCH_SIZE}"
+    ).columns(**{column: LargeBinary})
+    update_row = text(
+        f"UPDATE {table} SET {column} = :value WHERE id = :id"
+    ).bindparams(bindparam("value", type_=LargeBinary))
+
+    last_id, total = 0, 0
+    before_bytes, after_bytes = 0, 0
+    while True:
+        rows = db.session.execute(select_batch, {"last_id": last_id}).all()
+        if not rows:
+            break
+
+        updates = []
+        for row_id, blob in rows:
+            blob = bytes(blob)
+            packed = compress_text(blob[1:].decode("utf-8"))
+            before_bytes += len(blob)
+            after_bytes += len(packed)
+            if packed[0] != CODEC_RAW:
+                updates.append({"id": row_id, "value": packed})
+
+        if updates:
+            db.session.execute(update_row, updates)
+        db.session.commit()
+
+        last_id = rows[-1][0]
+        total += len(rows)
+
+    ratio = (after_bytes / before_bytes) if before_bytes else 1
+    print(f"✅ {table}.{column}: {total} rows, {before_bytes} → {after_bytes} bytes ({ratio:.0%})")
+
+
+if __name__ == "__main__":
+    with app.app_context():
+        for table, column in COLUMNS:
+            data_type = column_type(table, column)
+            if data_type != "bytea":
+                print(f"❌ {table}.{column} is {data_type}; run `alembic upgrade head` first")
+                continue
+            recompress_column(table, column)
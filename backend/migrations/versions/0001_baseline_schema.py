@@ -0,0 +1,248 @@
+"""baseline schema
+
+Creates every table the app uses, and brings databases that were built with
+db.create_all() (and the old upgrade_schema.py) up to the same shape. Every
+step is idempotent, so existing databases can run `alembic upgrade head`
+without being stamped first.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 17:52:07
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Steps formerly in upgrade_schema.py: columns and types that create_all never
+# added to tables that already existed (Postgres only; no-ops once applied)
+POSTGRES_UPGRADES = [
+    # Second-opinion reports persisted in user_reports / ai_analyses
+    "ALTER TABLE user_reports ALTER COLUMN user_id DROP NOT NULL",
+    "ALTER TABLE user_reports ADD COLUMN IF NOT EXISTS user_name VARCHAR(255)",
+    "ALTER TABLE user_reports ADD COLUMN IF NOT EXISTS file_paths TEXT",
+    "ALTER TABLE user_reports ADD COLUMN IF NOT EXISTS filenames TEXT",
+    "ALTER TABLE user_reports ADD COLUMN IF NOT EXISTS extracted_text BYTEA",
+    # Digest emails
+    "ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS digest_key VARCHAR(100)",
+    # Typed slot times: VARCHAR "HH:MM" / ISO strings → TIMESTAMPTZ
+    # (bare times become today's date, UTC; same rule as core.slots.parse_slot_time)
+    """
+    DO $$
+    BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'slots' AND column_name = 'start') = 'character varying' THEN
+            ALTER TABLE slots
+                ALTER COLUMN start TYPE TIMESTAMPTZ USING CASE
+                    WHEN NULLIF(start, '') IS NULL THEN NULL
+                    WHEN start ~ '^[0-9]{1,2}:[0-9]{2}(:[0-9]{2})?$' THEN (CURRENT_DATE + start::time) AT TIME ZONE 'UTC'
+                    ELSE start::timestamptz END,
+                ALTER COLUMN "end" TYPE TIMESTAMPTZ USING CASE
+                    WHEN NULLIF("end", '') IS NULL THEN NULL
+                    WHEN "end" ~ '^[0-9]{1,2}:[0-9]{2}(:[0-9]{2})?$' THEN (CURRENT_DATE + "end"::time) AT TIME ZONE 'UTC'
+                    ELSE "end"::timestamptz END;
+        END IF;
+    END $$
+    """,
+]
+
+
+def upgrade():
+    op.create_table('chat_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('report_id', sa.Integer(), nullable=False),
+    sa.Column('sender', sa.String(length=50), nullable=True),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_chat_messages_report_id_id', 'chat_messages', ['report_id', 'id'], if_not_exists=True)
+
+    op.create_table('doctor_dashboard_rows',
+    sa.Column('appointment_id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('appointment_id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_doctor_dashboard_rows_doctor_appt', 'doctor_dashboard_rows', ['doctor_id', 'appointment_id'], if_not_exists=True)
+
+    op.create_table('email_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('to', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=512), nullable=True),
+    sa.Column('body', sa.Text(), nullable=True),
+    sa.Column('attachment_paths', sa.Text(), nullable=True),
+    sa.Column('digest_key', sa.String(length=100), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_email_outbox_digest_key', 'email_outbox', ['digest_key'], if_not_exists=True)
+    op.create_index('ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'], if_not_exists=True)
+
+    op.create_table('resource_versions',
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key'),
+    if_not_exists=True
+    )
+    op.create_table('slots_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=True),
+    sa.Column('start', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('end', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_booked', sa.Boolean(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_slots_archive_doctor_id', 'slots_archive', ['doctor_id'], if_not_exists=True)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.String(length=50), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    if_not_exists=True
+    )
+    op.create_table('doctors',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('speciality', sa.String(length=100), nullable=True),
+    sa.Column('experience', sa.String(length=50), nullable=True),
+    sa.Column('rating', sa.String(length=10), nullable=True),
+    sa.Column('location', sa.String(length=100), nullable=True),
+    sa.Column('phone', sa.String(length=50), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('notification_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('unread', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id'),
+    if_not_exists=True
+    )
+    op.create_table('notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('message', sa.String(length=255), nullable=True),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_notifications_user_created', 'notifications', ['user_id', 'created_at'], if_not_exists=True)
+    op.create_index('ix_notifications_user_read_created', 'notifications', ['user_id', 'is_read', 'created_at'], if_not_exists=True)
+
+    op.create_table('user_reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('user_name', sa.String(length=255), nullable=True),
+    sa.Column('file_path', sa.String(length=512), nullable=False),
+    sa.Column('file_paths', sa.Text(), nullable=True),
+    sa.Column('filenames', sa.Text(), nullable=True),
+    sa.Column('extracted_text', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_user_reports_user_id_id', 'user_reports', ['user_id', 'id'], if_not_exists=True)
+
+    op.create_table('ai_analyses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('report_id', sa.Integer(), nullable=False),
+    sa.Column('risk_score', sa.Integer(), nullable=True),
+    sa.Column('risk_category', sa.String(length=50), nullable=True),
+    sa.Column('suggested_specialty', sa.String(length=100), nullable=True),
+    sa.Column('full_analysis_json', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['report_id'], ['user_reports.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('report_id'),
+    if_not_exists=True
+    )
+    op.create_table('slots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=False),
+    sa.Column('start', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('end', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_booked', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_slots_doctor_booked_start', 'slots', ['doctor_id', 'is_booked', 'start'], if_not_exists=True)
+
+    op.create_table('appointments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('doctor_id', sa.Integer(), nullable=True),
+    sa.Column('patient_id', sa.Integer(), nullable=True),
+    sa.Column('slot_id', sa.Integer(), nullable=True),
+    sa.Column('disease', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('ai_analysis', sa.LargeBinary(), nullable=True),
+    sa.Column('report_files', sa.Text(), nullable=True),
+    sa.Column('report_names', sa.Text(), nullable=True),
+    sa.Column('user_report_id', sa.Integer(), nullable=True),
+    sa.Column('video_channel', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('final_report_path', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['doctor_id'], ['doctors.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['slot_id'], ['slots.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+
+    op.create_table('reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('appointment_id', sa.Integer(), nullable=False),
+    sa.Column('doctor_notes', sa.Text(), nullable=True),
+    sa.Column('final_diagnosis', sa.Text(), nullable=True),
+    sa.Column('prescription', sa.Text(), nullable=True),
+    sa.Column('symptoms', sa.Text(), nullable=True),
+    sa.Column('clinical_findings', sa.Text(), nullable=True),
+    sa.Column('recommended_tests', sa.Text(), nullable=True),
+    sa.Column('lifestyle_advice', sa.Text(), nullable=True),
+    sa.Column('follow_up_days', sa.String(length=20), nullable=True),
+    sa.Column('pdf_path', sa.String(length=1024), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        for statement in POSTGRES_UPGRADES:
+            op.execute(statement)
+
+
+def downgrade():
+    for table in [
+        "reports", "appointments", "slots", "ai_analyses", "user_reports",
+        "notifications", "notification_counters", "doctors", "users",
+        "slots_archive", "resource_versions", "email_outbox",
+        "doctor_dashboard_rows", "chat_messages",
+    ]:
+        op.drop_table(table)
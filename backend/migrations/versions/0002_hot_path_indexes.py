@@ -0,0 +1,35 @@
+"""indexes for hot query paths
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 18:05:00
+"""
+from alembic import op
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns). Already covered elsewhere and so not repeated here:
+#   slots (doctor_id, is_booked)  → prefix of ix_slots_doctor_booked_start
+#   notifications.user_id         → prefix of ix_notifications_user_read_created
+#   ai_analyses.report_id         → its UNIQUE constraint is backed by an index
+INDEXES = [
+    ("ix_appointments_doctor_id_id", "appointments", ["doctor_id", "id"]),
+    ("ix_appointments_patient_id_id", "appointments", ["patient_id", "id"]),
+    ("ix_appointments_slot_id", "appointments", ["slot_id"]),
+    ("ix_doctors_email", "doctors", ["email"]),
+    ("ix_doctors_user_id", "doctors", ["user_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
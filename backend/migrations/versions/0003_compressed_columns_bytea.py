@@ -0,0 +1,50 @@
+"""compressed AI analysis columns: TEXT → BYTEA
+
+appointments.ai_analysis and ai_analyses.full_analysis_json are CompressedText
+(core.compression): a codec byte followed by the payload. Databases created
+before that still have them as TEXT, and the app's byte writes fail there.
+Every existing value is tagged as raw (codec byte 0), so it reads back
+unchanged; migrate_compressed_columns.py can re-encode those rows afterwards.
+Postgres only (SQLite databases are created with the new types by 0001);
+skipped for columns that are already BYTEA.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 21:30:00
+"""
+from alembic import op
+from core.compression import CODEC_RAW
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ("ai_analyses", "full_analysis_json"),
+    ("appointments", "ai_analysis"),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column in COLUMNS:
+        op.execute(f"""
+        DO $$
+        BEGIN
+            IF (SELECT data_type FROM information_schema.columns
+                WHERE table_name = '{table}' AND column_name = '{column}') IN ('text', 'character varying') THEN
+                ALTER TABLE {table} ALTER COLUMN {column} TYPE BYTEA USING CASE
+                    WHEN {column} IS NULL THEN NULL
+                    ELSE '\\x{CODEC_RAW:02x}'::bytea || convert_to({column}, 'UTF8') END;
+            END IF;
+        END $$
+        """)
+
+
+def downgrade():
+    # Compressed values can't be turned back into text in SQL; the columns
+    # stay BYTEA (0001's downgrade drops the tables)
+    pass
@@ -0,0 +1,33 @@
+"""backfill the doctor dashboard read model
+
+doctor_dashboard_rows is kept current by core.dashboard on every flush that
+touches an appointment, but rows for appointments that existed before the
+read model did have to be built once. Rebuilding is idempotent (each batch
+deletes and re-inserts its rows), so this is safe on databases where
+rebuild_dashboard.py was already run by hand. Runs after 0003, since the
+payload is built from the (now BYTEA) appointments.ai_analysis column.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 21:40:00
+"""
+from alembic import context, op
+from core.dashboard import backfill_dashboard
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if context.is_offline_mode():
+        # --sql scripts can't read rows: run rebuild_dashboard.py after applying
+        return
+    backfill_dashboard(op.get_bind())
+
+
+def downgrade():
+    # Data only; the table itself belongs to 0001
+    pass
@@ -0,0 +1,16 @@
+# outbox_worker.py
+# Delivers queued emails from the email_outbox table, writes staged
+# notifications to the inbox and archives expired slots.
+# Run one or more of these next to the web workers: python outbox_worker.py
+import time
+from app import app
+from core.outbox import start_outbox_worker
+from core.notifications import start_notification_flusher
+from core.slots import start_slot_archiver
+
+if __name__ == "__main__":
+    start_outbox_worker(app)
+    start_notification_flusher(app)
+    start_slot_archiver(app)
+    while True:
+        time.sleep(3600)
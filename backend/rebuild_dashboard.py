@@ -0,0 +1,16 @@
+# rebuild_dashboard.py
+# Backfill (or repair) the doctor_dashboard_rows read model from appointments.
+# New and changed appointments keep it current on their own, and
+# `alembic upgrade head` (revision 0004) backfills existing ones; use this to
+# repair it, for everyone or one doctor: python rebuild_dashboard.py 42
+import sys
+from app import app
+from core.database import db
+from core.dashboard import rebuild_dashboard
+
+if __name__ == "__main__":
+    doctor_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    with app.app_context():
+        db.create_all()
+        count = rebuild_dashboard(doctor_id)
+    print(f"✅ Rebuilt dashboard rows for {count} appointments")
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
-from agora_token_builder import RtcTokenBuilder
+from core.lazy import lazy_module
 import time, os, random
 
+agora_token_builder = lazy_module("agora_token_builder")
+
 agora_bp = Blueprint("agora_bp", __name__)
 
 APP_ID = os.getenv("AGORA_APP_ID", "<YOUR_AGORA_APP_ID>")
@@ -30,7 +32,7 @@ def generate_token():
     current_timestamp = int(time.time())
     privilege_expired_ts = current_timestamp + expiration_time_in_seconds
 
-    token = RtcTokenBuilder.buildTokenWithUid(
+    token = agora_token_builder.RtcTokenBuilder.buildTokenWithUid(
         APP_ID,
         APP_CERTIFICATE,
         channel_name,
@@ -1,13 +1,23 @@
 from flask import Blueprint, request, jsonify
 from core.database import db
 from core.models import Appointment, Notification, Slot, Doctor, User
-from core.notifications import send_notification
-from core.email_service import send_email   # ✅ EMAIL SUPPORT
+from core.notifications import send_notification, send_user_email
+from core.outbox import enqueue_email   # ✅ EMAIL SUPPORT (delivered by the outbox worker)
+from core.booking import claim_slot, release_slot
+from core.slots import format_slot_range, iso
+from core.versions import conditional, patient_appts_key
+from core.pagination import page_limit
 import json
+import logging
 import os
 
+log = logging.getLogger(__name__)
+
 appointments_bp = Blueprint("appointments", __name__)
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 # ------------------------------------------------
 # 1️⃣ USER REQUESTS APPOINTMENT (AUTO-ACCEPT)
 #    Accepts optional report_path & report_name to attach to doctor email
@@ -44,11 +54,11 @@ def request_appointment():
     user_report_id  = data.get("user_report_id")
 
     # ---------------------------------------
-    # SLOT VALIDATION
+    # SLOT CLAIM (atomic, commits with the appointment below)
     # ---------------------------------------
-    slot = Slot.query.get(slot_id)
-    if not slot or slot.is_booked:
+    if not claim_slot(slot_id, doctor_id):
         return jsonify({"error": "Slot unavailable"}), 400
+    slot = Slot.query.get(slot_id)
 
     # ---------------------------------------
     # UNIQUE VIDEO CHANNEL
@@ -72,11 +82,9 @@ def request_appointment():
         user_report_id=user_report_id
     )
 
-    slot.is_booked = True
-    appt.slot_time = f"{slot.start} - {slot.end}"
+    appt.slot_time = format_slot_range(slot)
 
     db.session.add(appt)
-    db.session.commit()
 
     # ---------------------------------------
     # FETCH USER DETAILS
@@ -100,12 +108,10 @@ def request_appointment():
         ai_summary += f"Explanation: {explanation}\n\n"
 
     # ---------------------------------------
-    # ATTACHMENTS
+    # ATTACHMENTS (checked by the outbox worker when it sends, so the
+    # request never waits on a background upload write)
     # ---------------------------------------
-    attachment_paths = []
-    for p in file_paths:
-        if os.path.exists(p):
-            attachment_paths.append(p)
+    attachment_paths = list(file_paths)
 
     # ---------------------------------------
     # EMAIL → DOCTOR
@@ -130,7 +136,9 @@ Regards,
 NextOpinion
 """
 
-    send_email(
+    # Doctor-facing mail is folded into the doctor's digest
+    send_user_email(
+        doctor.user_id,
         to=doctor.email,
         subject="New Second Opinion Appointment",
         body=doctor_email_body,
@@ -152,16 +160,19 @@ Regards,
 NextOpinion
 """
 
-    send_email(
+    enqueue_email(
         to=patient.email,
         subject="Your Appointment is Confirmed",
         body=patient_email_body
     )
 
+    # Appointment, slot and both emails are committed together
+    db.session.commit()
+
     # ---------------------------------------
     # IN-APP NOTIFICATION
     # ---------------------------------------
-    send_notification(doctor_id, "New appointment request received")
+    send_notification(doctor.user_id, "New appointment request received")
 
     return jsonify({
         "status": "success",
@@ -173,11 +184,34 @@ NextOpinion
 
 
 # ------------------------------------------------
-# 2️⃣ PATIENT APPOINTMENT HISTORY
+# 2️⃣ PATIENT APPOINTMENT HISTORY (newest first, keyset paginated)
+#    ?before_id=&limit=
 # ------------------------------------------------
 @appointments_bp.route("/patient/<int:patient_id>/appointments", methods=["GET"])
+@conditional(lambda patient_id: [patient_appts_key(patient_id)])
 def get_patient_appointments(patient_id):
-    appts = Appointment.query.filter_by(patient_id=patient_id).all()
+    before_id = request.args.get("before_id", type=int)
+    limit = page_limit(request.args, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+    # One SELECT per page: doctor name and slot times are joined in, and the
+    # large ai_analysis / report columns are never loaded for a listing
+    query = (
+        Appointment.query
+        .options(
+            db.load_only(Appointment.id, Appointment.disease, Appointment.status,
+                         Appointment.created_at, Appointment.video_channel,
+                         Appointment.final_report_path),
+            db.joinedload(Appointment.doctor).load_only(Doctor.id)
+              .joinedload(Doctor.user).load_only(User.name),
+            db.joinedload(Appointment.slot).load_only(Slot.start, Slot.end),
+        )
+        .filter(Appointment.patient_id == patient_id)
+        .order_by(Appointment.id.desc())
+    )
+    if before_id is not None:
+        query = query.filter(Appointment.id < before_id)
+
+    appts = query.limit(limit).all()
 
     result = []
     for a in appts:
@@ -185,15 +219,18 @@ def get_patient_appointments(patient_id):
             "id": a.id,
             "doctor_name": a.doctor.user.name if a.doctor and a.doctor.user else "Unknown",
             "disease": a.disease,
-            "slot_start": a.slot.start if a.slot else "-",
-            "slot_end": a.slot.end if a.slot else "-",
+            "slot_start": iso(a.slot.start) if a.slot else "-",
+            "slot_end": iso(a.slot.end) if a.slot else "-",
             "status": a.status,
-            "date": a.created_at.strftime("%Y-%m-%d"),
+            "date": a.created_at.strftime("%Y-%m-%d") if a.created_at else None,
             "video_channel": a.video_channel,
             "final_report_path": a.final_report_path 
         })
 
-    return jsonify({"appointments": result})
+    return jsonify({
+        "appointments": result,
+        "next_before_id": appts[-1].id if len(appts) == limit else None
+    })
 
 
 # ------------------------------------------------
@@ -206,53 +243,49 @@ def cancel_appointment(id):
         return jsonify({"error": "Appointment not found"}), 404
 
     # Free the slot
-    if appt.slot:
-        appt.slot.is_booked = False
+    release_slot(appt.slot_id)
 
     appt.status = "cancelled"
-    db.session.commit()
 
     patient = appt.patient
     doctor = appt.doctor
 
     # EMAIL: Patient
-    try:
-        if patient:
-            send_email(
-                to=patient.email,
-                subject="Appointment Cancelled",
-                body=f"""Hello {patient.name},
+    if patient:
+        enqueue_email(
+            to=patient.email,
+            subject="Appointment Cancelled",
+            body=f"""Hello {patient.name},
 
 Your appointment with Dr. {doctor.user.name if doctor and doctor.user else 'Doctor'} has been cancelled.
 
 Thank you,
 NextOpinion
 """
-            )
-    except Exception as e:
-        print(f"⚠️ Failed to send patient cancellation email: {e}")
+        )
 
     # EMAIL: Doctor
-    try:
-        if doctor:
-            send_email(
-                to=doctor.email,
-                subject="Appointment Cancelled",
-                body=f"""Hello Dr. {doctor.user.name if doctor and doctor.user else 'Doctor'},
+    if doctor:
+        send_user_email(
+            doctor.user_id,
+            to=doctor.email,
+            subject="Appointment Cancelled",
+            urgent=True,    # frees / moves a slot the doctor may be planning around
+            body=f"""Hello Dr. {doctor.user.name if doctor and doctor.user else 'Doctor'},
 
 The patient {patient.name if patient else 'Unknown'} has cancelled their appointment.
 
 Regards,
 NextOpinion
 """
-            )
-    except Exception as e:
-        print(f"⚠️ Failed to send doctor cancellation email: {e}")
+        )
+
+    db.session.commit()
 
     try:
-        send_notification(doctor.id, "A patient cancelled their appointment.")
+        send_notification(doctor.user_id, "A patient cancelled their appointment.")
     except Exception as e:
-        print(f"⚠️ Failed to create notification: {e}")
+        log.warning("Failed to create notification: %s", e)
 
     return jsonify({"status": "cancelled"})
 
@@ -273,30 +306,25 @@ def reschedule_appointment(id):
     if not new_slot:
         return jsonify({"error": "Slot not found"}), 404
 
-    if new_slot.is_booked:
+    # Book new slot (atomic claim, so two reschedules can't take the same slot)
+    if not claim_slot(new_slot_id, appt.doctor_id):
         return jsonify({"error": "This slot is already booked"}), 400
 
     # Free old slot
-    if appt.slot:
-        appt.slot.is_booked = False
+    release_slot(appt.slot_id)
 
-    # Book new slot
     appt.slot_id = new_slot_id
-    new_slot.is_booked = True
-    appt.slot_time = f"{new_slot.start} - {new_slot.end}"
-
-    db.session.commit()
+    appt.slot_time = format_slot_range(new_slot)
 
     patient = appt.patient
     doctor = appt.doctor
 
     # EMAIL: Patient
-    try:
-        if patient:
-            send_email(
-                to=patient.email,
-                subject="Appointment Rescheduled",
-                body=f"""Hello {patient.name},
+    if patient:
+        enqueue_email(
+            to=patient.email,
+            subject="Appointment Rescheduled",
+            body=f"""Hello {patient.name},
 
 Your appointment with Dr. {doctor.user.name if doctor and doctor.user else 'Doctor'} has been rescheduled.
 
@@ -305,17 +333,16 @@ New Slot: {appt.slot_time}
 Thank you,
 NextOpinion
 """
-            )
-    except Exception as e:
-        print(f"⚠️ Failed to send patient reschedule email: {e}")
+        )
 
     # EMAIL: Doctor
-    try:
-        if doctor:
-            send_email(
-                to=doctor.email,
-                subject="Appointment Rescheduled",
-                body=f"""Hello Dr. {doctor.user.name if doctor and doctor.user else 'Doctor'},
+    if doctor:
+        send_user_email(
+            doctor.user_id,
+            to=doctor.email,
+            subject="Appointment Rescheduled",
+            urgent=True,    # frees / moves a slot the doctor may be planning around
+            body=f"""Hello Dr. {doctor.user.name if doctor and doctor.user else 'Doctor'},
 
 The appointment for {patient.name if patient else 'Unknown'} has been rescheduled.
 
@@ -324,13 +351,13 @@ New Slot: {appt.slot_time}
 Regards,
 NextOpinion
 """
-            )
-    except Exception as e:
-        print(f"⚠️ Failed to send doctor reschedule email: {e}")
+        )
+
+    db.session.commit()
 
     try:
-        send_notification(doctor.id, "A patient rescheduled their appointment.")
+        send_notification(doctor.user_id, "A patient rescheduled their appointment.")
     except Exception as e:
-        print(f"⚠️ Failed to create notification: {e}")
+        log.warning("Failed to create notification: %s", e)
 
     return jsonify({"status": "rescheduled"})
@@ -1,19 +1,178 @@
-from flask import Blueprint, jsonify, request
+import os
+import json
+import time
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from core.database import db
+from core.pagination import page_limit
+from core.models import ChatMessage
+from core.pubsub import get_broker, TooManySubscribers
 
 chat_bp = Blueprint("chat", __name__)
-chats = []
 
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 500
+MAX_BATCH_SIZE = 100
+
+# Push endpoints (SSE / long-poll)
+HEARTBEAT_SECONDS = int(os.getenv("CHAT_HEARTBEAT_SECONDS", "15"))
+STREAM_MAX_SECONDS = int(os.getenv("CHAT_STREAM_MAX_SECONDS", "300"))
+LONG_POLL_MAX_SECONDS = int(os.getenv("CHAT_LONG_POLL_MAX_SECONDS", "30"))
+
+
+def chat_channel(report_id):
+    return f"chat:{report_id}"
+
+
+def serialize_message(m):
+    return {
+        "id": m.id,
+        "report_id": m.report_id,
+        "sender": m.sender,
+        "message": m.message,
+        "created_at": m.created_at.isoformat() if m.created_at else None,
+    }
+
+
+# ------------------------------------------------
+# 1️⃣ FETCH MESSAGES (cursor: ?after_id=&limit=)
+#    Index on (report_id, id) → cost depends on page size only
+# ------------------------------------------------
 @chat_bp.route("/chat/<int:report_id>", methods=["GET"])
 def get_chat(report_id):
-    filtered = [m for m in chats if m["report_id"] == report_id]
-    return jsonify({"status": "success", "messages": filtered})
+    after_id = request.args.get("after_id", 0, type=int)
+    limit = page_limit(request.args, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+    messages = fetch_messages(report_id, after_id, limit)
 
+    return jsonify({
+        "status": "success",
+        "messages": messages,
+        "next_after_id": messages[-1]["id"] if messages else after_id,
+        "has_more": len(messages) == limit
+    })
+
+
+def fetch_messages(report_id, after_id, limit=DEFAULT_PAGE_SIZE):
+    rows = (
+        ChatMessage.query
+        .filter(ChatMessage.report_id == report_id, ChatMessage.id > after_id)
+        .order_by(ChatMessage.id)
+        .limit(limit)
+        .all()
+    )
+    return [serialize_message(m) for m in rows]
+
+
+# ------------------------------------------------
+# 2️⃣ SEND MESSAGE(S)
+#    Body: {"sender", "message"} or {"messages": [{...}, ...]}
+#    Batches go out in a single INSERT + commit
+# ------------------------------------------------
 @chat_bp.route("/chat/<int:report_id>/send", methods=["POST"])
 def send_chat(report_id):
-    payload = request.get_json() or {}
-    chats.append({
-        "report_id": report_id,
-        "sender": payload.get("sender", "user"),
-        "message": payload.get("message", "")
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    items = payload.get("messages") or [payload]
+
+    if not isinstance(items, list) or not all(
+        isinstance(item, dict)
+        and isinstance(item.get("sender", "user"), str)
+        and isinstance(item.get("message", ""), str)
+        for item in items
+    ):
+        return jsonify({"error": "messages must be a list of {sender, message} objects"}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} messages per request"}), 400
+
+    rows = [
+        {
+            "report_id": report_id,
+            "sender": item.get("sender", "user"),
+            "message": item.get("message", "")
+        }
+        for item in items
+        if item.get("message")
+    ]
+    if not rows:
+        return jsonify({"error": "Message is empty"}), 400
+
+    db.session.execute(db.insert(ChatMessage), rows)
+    db.session.commit()
+
+    # Wake up SSE / long-poll listeners; they read the new rows themselves
+    get_broker().publish(chat_channel(report_id), {"report_id": report_id})
+
+    return jsonify({"status": "success", "count": len(rows)})
+
+
+# ------------------------------------------------
+# 3️⃣ LIVE STREAM (Server-Sent Events)
+#    ?after_id= or Last-Event-ID header to resume
+# ------------------------------------------------
+@chat_bp.route("/chat/<int:report_id>/stream", methods=["GET"])
+def stream_chat(report_id):
+    after_id = request.headers.get("Last-Event-ID", type=int) or request.args.get("after_id", 0, type=int)
+
+    try:
+        sub = get_broker().subscribe(chat_channel(report_id))
+    except TooManySubscribers as e:
+        return jsonify({"error": str(e)}), 503
+
+    def generate():
+        cursor = after_id
+        deadline = time.time() + STREAM_MAX_SECONDS
+        try:
+            while time.time() < deadline:
+                messages = fetch_messages(report_id, cursor)
+                # Give the DB connection back while we sit idle
+                db.session.remove()
+
+                for m in messages:
+                    cursor = m["id"]
+                    yield f"id: {m['id']}\nevent: message\ndata: {json.dumps(m)}\n\n"
+
+                if len(messages) == DEFAULT_PAGE_SIZE:
+                    continue  # more backlog to catch up on
+                if not sub.get(timeout=HEARTBEAT_SECONDS):
+                    yield ": ping\n\n"
+        finally:
+            sub.close()
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # The generator's finally never runs if it is never started (HEAD, client
+    # gone before the first chunk); the server always closes the response
+    response.call_on_close(sub.close)
+    return response
+
+
+# ------------------------------------------------
+# 4️⃣ LONG-POLL (for clients without EventSource)
+#    Returns as soon as something newer than after_id exists
+# ------------------------------------------------
+@chat_bp.route("/chat/<int:report_id>/poll", methods=["GET"])
+def poll_chat(report_id):
+    after_id = request.args.get("after_id", 0, type=int)
+    timeout = min(request.args.get("timeout", LONG_POLL_MAX_SECONDS, type=int), LONG_POLL_MAX_SECONDS)
+
+    try:
+        sub = get_broker().subscribe(chat_channel(report_id))
+    except TooManySubscribers as e:
+        return jsonify({"error": str(e)}), 503
+
+    with sub:
+        messages = fetch_messages(report_id, after_id)
+        if not messages:
+            db.session.remove()
+            if sub.get(timeout=timeout):
+                messages = fetch_messages(report_id, after_id)
+
+    return jsonify({
+        "status": "success",
+        "messages": messages,
+        "next_after_id": messages[-1]["id"] if messages else after_id
     })
-    return jsonify({"status": "success"})
@@ -1,12 +1,23 @@
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, jsonify, request, send_file
 from core.database import db
+from core.pagination import page_limit
 from core.models import Doctor, Slot, Appointment, User
 from core.notifications import send_notification
+from core.slots import (
+    parse_slot_time, serialize_slot, slot_window_query, iso,
+    expand_recurrence, find_overlaps, first_overlap, create_slots_bulk
+)
+from core.slot_index import index_added
+from core.dashboard import dashboard_page
+from core.versions import conditional, doctor_slots_key, doctor_appts_key
 import json
 import os
 
 doctor_dashboard_bp = Blueprint("doctor_dashboard", __name__)
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 
 # -----------------------------------------------------------
 # 1️⃣ FETCH DOCTOR PROFILE ONLY
@@ -36,43 +47,95 @@ def get_doctor_profile(doctor_id):
 def add_slot(doctor_id):
     data = request.json or {}
 
+    # start / end: ISO datetimes, or "HH:MM" together with an optional "date"
+    try:
+        start = parse_slot_time(data.get("start"), data.get("date"))
+        end = parse_slot_time(data.get("end"), data.get("date"))
+    except ValueError:
+        return jsonify({"error": "start / end must be ISO datetimes or HH:MM"}), 400
+
+    if not start or not end or end <= start:
+        return jsonify({"error": "A slot needs a start before its end"}), 400
+
+    clash = first_overlap(doctor_id, start, end)
+    if clash:
+        return jsonify({
+            "error": "Slot overlaps an existing slot",
+            "conflict": {"id": clash[2], "start": iso(clash[0]), "end": iso(clash[1])}
+        }), 409
+
     slot = Slot(
         doctor_id=doctor_id,
-        start=data.get("start"),
-        end=data.get("end")
+        start=start,
+        end=end,
+        is_booked=False
     )
 
     db.session.add(slot)
+    db.session.flush()
+    index_added(slot)
     db.session.commit()
 
+    return jsonify({"slot": serialize_slot(slot)}), 200
+
+
+# -----------------------------------------------------------
+# 2️⃣b DOCTOR PUBLISHES RECURRING SLOTS IN ONE CALL
+# -----------------------------------------------------------
+@doctor_dashboard_bp.route("/doctor/<int:doctor_id>/slots/bulk", methods=["POST"])
+def add_slots_bulk(doctor_id):
+    """Expand a recurrence rule (see core.slots.expand_recurrence) into slots.
+
+    on_conflict: "skip" (default) leaves out slots overlapping existing ones,
+    "reject" creates nothing and returns 409. dry_run previews without writing.
+    """
+    data = request.json or {}
+    on_conflict = data.get("on_conflict", "skip")
+
+    try:
+        candidates = expand_recurrence(data)
+    except KeyError as e:
+        return jsonify({"error": f"Missing field: {e.args[0]}"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    free, clashing = find_overlaps(doctor_id, candidates)
+
+    if clashing and on_conflict == "reject":
+        return jsonify({
+            "error": "Some slots overlap existing ones",
+            "conflicts": [{"start": iso(a), "end": iso(b)} for a, b in clashing[:50]],
+            "conflict_count": len(clashing)
+        }), 409
+
+    if not data.get("dry_run"):
+        create_slots_bulk(doctor_id, free)
+        db.session.commit()
+
     return jsonify({
-        "slot": {
-            "id": slot.id,
-            "start": slot.start,
-            "end": slot.end,
-            "is_booked": slot.is_booked
-        }
+        "created": 0 if data.get("dry_run") else len(free),
+        "skipped": len(clashing),
+        "first": iso(free[0][0]) if free else None,
+        "last": iso(free[-1][0]) if free else None
     }), 200
 
 
 # -----------------------------------------------------------
-# 3️⃣ FETCH DOCTOR FREE SLOTS
+# 3️⃣ FETCH DOCTOR SLOTS (upcoming, ?from=&to=&limit=&free=1)
+#    The one GET for this URL: the dashboard lists every slot,
+#    patient booking pages pass free=1 for open slots only.
 # -----------------------------------------------------------
 @doctor_dashboard_bp.route("/doctor/<int:doctor_id>/slots", methods=["GET"])
+@conditional(lambda doctor_id: [doctor_slots_key(doctor_id)], time_bucket=60)
 def get_doctor_slots(doctor_id):
-    slots = Slot.query.filter_by(doctor_id=doctor_id).all()
+    try:
+        slots = slot_window_query(
+            doctor_id, request.args, only_free=request.args.get("free") in ("1", "true")
+        ).all()
+    except ValueError:
+        return jsonify({"error": "from / to must be ISO datetimes"}), 400
 
-    return jsonify({
-        "slots": [
-            {
-                "id": s.id,
-                "start": s.start,
-                "end": s.end,
-                "is_booked": s.is_booked
-            }
-            for s in slots
-        ]
-    }), 200
+    return jsonify({"slots": [serialize_slot(s) for s in slots]}), 200
 
 
 # -----------------------------------------------------------
@@ -88,14 +151,16 @@ def update_appointment_status(appt_id, action):
         appt.status = "accepted"
         send_notification(
             appt.patient_id,
-            f"Your appointment with Dr. {appt.doctor.user.name} has been accepted."
+            f"Your appointment with Dr. {appt.doctor.user.name} has been accepted.",
+            urgent=True
         )
 
     elif action == "reject":
         appt.status = "rejected"
         send_notification(
             appt.patient_id,
-            "Your appointment request has been rejected."
+            "Your appointment request has been rejected.",
+            urgent=True
         )
 
     else:
@@ -131,47 +196,25 @@ def submit_final_report(appt_id):
 
 
 # -----------------------------------------------------------
-# 6️⃣ FETCH FULL DOCTOR APPOINTMENT LIST
+# 6️⃣ FETCH DOCTOR APPOINTMENT LIST (newest first, keyset paginated)
+#    ?before_id=&limit=
 # -----------------------------------------------------------
 @doctor_dashboard_bp.route("/doctor/<int:doctor_id>/appointments", methods=["GET"])
+@conditional(lambda doctor_id: [doctor_appts_key(doctor_id)])
 def get_doctor_appointments(doctor_id):
-    appointments = Appointment.query.filter_by(doctor_id=doctor_id).all()
-
-    appt_list = []
-
-    for a in appointments:
-        try:
-            ai_data = json.loads(a.ai_analysis) if a.ai_analysis else []
-        except:
-            ai_data = []
-
-        try:
-            file_paths = json.loads(a.report_files) if a.report_files else []
-            file_names = json.loads(a.report_names) if a.report_names else []
-        except:
-            file_paths, file_names = [], []
-
-        reports = []
-        for p, n in zip(file_paths, file_names):
-            reports.append({
-                "name": n,
-                "path": p,
-                "download_url": f"/api/reports/download?path={p}"
-            })
-
-        appt_list.append({
-            "id": a.id,
-            "patient_name": a.patient.name if a.patient else "Unknown",
-            "disease": a.disease,
-            "slot_start": a.slot.start if a.slot else None,
-            "slot_end": a.slot.end if a.slot else None,
-            "status": a.status,
-            "video_channel": a.video_channel,
-            "ai_analysis": ai_data,
-            "reports": reports
-        })
-
-    return jsonify({"appointments": appt_list}), 200
+    before_id = request.args.get("before_id", type=int)
+    limit = page_limit(request.args, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+    # Pre-serialized rows from the read model (core.dashboard): one indexed
+    # SELECT, and the stored JSON is spliced into the response as-is
+    rows = dashboard_page(doctor_id, before_id, limit)
+    next_before_id = rows[-1].appointment_id if len(rows) == limit else None
+
+    body = (
+        '{"appointments": [' + ", ".join(r.payload for r in rows) + '], '
+        '"next_before_id": ' + json.dumps(next_before_id) + '}'
+    )
+    return Response(body, status=200, mimetype="application/json")
 
 
 # -----------------------------------------------------------
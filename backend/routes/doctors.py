@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
-from core.data_loader import doctor_data
+from core.data_loader import get_doctor_data
 from core.models import Doctor
+from core.slots import earliest_free_slots, parse_slot_time, MAX_SLOTS_PER_DOCTOR
 
 doctors_bp = Blueprint("doctors", __name__)
 
@@ -10,7 +11,7 @@ def get_all_doctors():
     keyword = request.args.get("keyword", "").lower()
     location = request.args.get("location", "").lower()
 
-    filtered = doctor_data.copy()
+    filtered = get_doctor_data().copy()
     if speciality:
         filtered = filtered[filtered["speciality"].str.lower().str.contains(speciality, na=False)]
     if keyword:
@@ -65,3 +66,30 @@ def get_doctor_by_id(doctor_id):
         "rating": doctor.rating,
         "phone": doctor.phone,
     }), 200
+
+
+# ✅ Earliest free slots for several doctors in one call
+#    ?ids=1,2,3&limit=3&from=<ISO datetime>
+@doctors_bp.route("/doctors/availability", methods=["GET"])
+def get_doctors_availability():
+    try:
+        doctor_ids = [int(i) for i in request.args.get("ids", "").split(",") if i.strip()]
+        after = parse_slot_time(request.args.get("from"))
+    except ValueError:
+        return jsonify({"error": "ids must be integers and from an ISO datetime"}), 400
+
+    if not doctor_ids:
+        return jsonify({"error": "ids is required"}), 400
+    if len(doctor_ids) > 100:
+        return jsonify({"error": "At most 100 doctors per request"}), 400
+
+    # Up to 100 doctors per call, so the per-doctor count stays small
+    per_doctor = request.args.get("limit", 3, type=int)
+    if per_doctor > MAX_SLOTS_PER_DOCTOR:
+        return jsonify({"error": f"limit is at most {MAX_SLOTS_PER_DOCTOR} slots per doctor"}), 400
+    per_doctor = max(1, per_doctor)
+    available = earliest_free_slots(doctor_ids, per_doctor, after)
+
+    return jsonify({
+        "availability": {str(doctor_id): slots for doctor_id, slots in available.items()}
+    }), 200
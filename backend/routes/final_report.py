@@ -2,10 +2,12 @@
 from flask import Blueprint, request, jsonify, send_from_directory
 from core.database import db
 from core.models import Appointment, Report, Doctor, User
-from fpdf import FPDF
+from core.lazy import lazy_module
 import os
 import re
 
+fpdf = lazy_module("fpdf")   # loaded when the first PDF is generated
+
 final_report_bp = Blueprint("final_report", __name__)
 
 PDF_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "generated_reports")
@@ -57,7 +59,7 @@ def submit_final_report_full(appointment_id):
 
 
 def generate_pdf_report(appointment, report):
-    pdf = FPDF()
+    pdf = fpdf.FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=12)
 
@@ -0,0 +1,14 @@
+from flask import Blueprint, jsonify
+from core.health import database_health
+
+health_bp = Blueprint("health", __name__)
+
+
+# ✅ Liveness + database probe for load balancers / orchestrators
+@health_bp.route("/health", methods=["GET"])
+def health():
+    database = database_health()
+    return jsonify({
+        "status": "ok" if database["ok"] else "degraded",
+        "database": database
+    }), 200 if database["ok"] else 503
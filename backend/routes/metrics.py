@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+from core import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+# 📈 Prometheus scrape endpoint (latency, SQL, Gemini and SMTP histograms)
+@metrics_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
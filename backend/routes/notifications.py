@@ -0,0 +1,109 @@
+from datetime import datetime
+from flask import Blueprint, jsonify, request
+from core.database import db
+from core.pagination import page_limit
+from core.models import Notification, User
+from core.notifications import get_unread_count, mark_read
+
+notifications_bp = Blueprint("notifications", __name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(n):
+    return f"{n.created_at.isoformat()}_{n.id}"
+
+
+def parse_id(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TypeError(value)
+    return int(value)
+
+
+def decode_cursor(cursor):
+    created_at, _, notif_id = cursor.rpartition("_")
+    return datetime.fromisoformat(created_at), int(notif_id)
+
+
+# ------------------------------------------------
+# 1️⃣ INBOX (newest first, keyset paginated)
+#    ?unread_only=1&cursor=<next_cursor>&limit=
+# ------------------------------------------------
+@notifications_bp.route("/notifications/<int:user_id>", methods=["GET"])
+def get_inbox(user_id):
+    unread_only = request.args.get("unread_only") in ("1", "true")
+    cursor = request.args.get("cursor")
+    limit = page_limit(request.args, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+    query = Notification.query.filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read.is_(False))
+
+    if cursor:
+        try:
+            created_at, notif_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        query = query.filter(db.or_(
+            Notification.created_at < created_at,
+            db.and_(Notification.created_at == created_at, Notification.id < notif_id)
+        ))
+
+    rows = (
+        query
+        .order_by(Notification.created_at.desc(), Notification.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+    return jsonify({
+        "notifications": [
+            {
+                "id": n.id,
+                "message": n.message,
+                "is_read": n.is_read,
+                "created_at": n.created_at.isoformat() if n.created_at else None,
+            }
+            for n in rows
+        ],
+        "next_cursor": encode_cursor(rows[-1]) if len(rows) == limit else None
+    }), 200
+
+
+# ------------------------------------------------
+# 2️⃣ UNREAD COUNT (maintained counter, no COUNT(*))
+# ------------------------------------------------
+@notifications_bp.route("/notifications/<int:user_id>/unread_count", methods=["GET"])
+def unread_count(user_id):
+    if not db.session.get(User, user_id):
+        return jsonify({"error": "User not found"}), 404
+    return jsonify({"user_id": user_id, "unread": get_unread_count(user_id)}), 200
+
+
+# ------------------------------------------------
+# 3️⃣ BULK MARK AS READ
+#    Body: {"ids": [1, 2, 3]} or {"all": true}
+# ------------------------------------------------
+@notifications_bp.route("/notifications/<int:user_id>/read", methods=["POST"])
+def mark_notifications_read(user_id):
+    data = request.get_json(silent=True) or {}
+    if not db.session.get(User, user_id):
+        return jsonify({"error": "User not found"}), 404
+
+    if data.get("all"):
+        changed = mark_read(user_id)
+    elif isinstance(data.get("ids"), list) and data["ids"]:
+        try:
+            ids = [parse_id(i) for i in data["ids"]]
+        except (TypeError, ValueError):
+            return jsonify({"error": "'ids' must be a list of integers"}), 400
+        changed = mark_read(user_id, ids)
+    else:
+        return jsonify({"error": "Provide 'ids' or 'all': true"}), 400
+
+    return jsonify({
+        "status": "success",
+        "marked_read": changed,
+        "unread": get_unread_count(user_id)
+    }), 200
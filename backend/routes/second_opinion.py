@@ -1,31 +1,93 @@
-import os
+import json
+import re
 from flask import Blueprint, request, jsonify
+from core.database import db
+from core.models import User, UserReport, AIAnalysis
 from core.extract_text import extract_text_from_file
+from core.chunked_upload import UploadError, get_extraction
 from core.doctor_matcher import match_doctors_from_dataset, call_gemini
+from core.slots import attach_next_slots, MAX_SLOTS_PER_DOCTOR
+from core.pagination import page_limit
 
 second_opinion_bp = Blueprint("second_opinion", __name__)
 
-# Temporary in-memory storage (until DB integration)
-reports = []
-next_report_id = 1
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def summarize_risk(ai_result):
+    """Derive the AIAnalysis summary columns from Gemini's condition list."""
+    risk_score = 0
+    for entry in ai_result:
+        match = re.search(r"\d+", str(entry.get("risk", "")))
+        if match:
+            risk_score = max(risk_score, min(int(match.group()), 100))
+
+    if risk_score >= 70:
+        risk_category = "High"
+    elif risk_score >= 40:
+        risk_category = "Medium"
+    else:
+        risk_category = "Low"
+
+    suggested_specialty = None
+    for entry in ai_result:
+        doctors = entry.get("recommended_doctors") or []
+        if doctors:
+            suggested_specialty = doctors[0].get("speciality")
+            break
+
+    return risk_score, risk_category, suggested_specialty
 
 
 @second_opinion_bp.route("/second_opinion", methods=["POST"])
 def second_opinion():
     """
     Handles MULTIPLE report files:
-    - Extracts text from all files
+    - Extracts text from all files (or finalized chunked uploads)
     - Sends combined text to Gemini
     - Adds recommended doctors
+    - Stores the report + analysis in user_reports / ai_analyses
     - Returns AI + file_paths to frontend
     """
-    global next_report_id
-
     extracted_text = ""
     file_paths = []
     filenames = []
 
     user_name = request.form.get("user_name", "Anonymous")
+    raw_user_id = request.form.get("user_id") or (request.get_json(silent=True) or {}).get("user_id")
+    user_id = None
+    if raw_user_id not in (None, ""):
+        # Stored as a foreign key: reject anything that isn't an existing user
+        try:
+            if isinstance(raw_user_id, bool):
+                raise ValueError
+            user_id = int(raw_user_id)
+        except (TypeError, ValueError):
+            return jsonify({"error": "user_id must be an integer"}), 400
+        if not db.session.execute(db.select(db.exists().where(User.id == user_id))).scalar():
+            return jsonify({"error": "User not found"}), 400
+
+    # Validated before the (paid) Gemini call, not after it
+    raw_include_slots = (
+        request.form.get("include_slots")
+        or (request.get_json(silent=True) or {}).get("include_slots")
+    )
+    include_slots = 0
+    if raw_include_slots not in (None, ""):
+        try:
+            if isinstance(raw_include_slots, bool):
+                raise ValueError
+            include_slots = max(0, min(int(raw_include_slots), MAX_SLOTS_PER_DOCTOR))
+        except (TypeError, ValueError):
+            return jsonify({"error": "include_slots must be an integer"}), 400
+
+    upload_ids = (
+        request.form.getlist("upload_ids[]")
+        or (request.get_json(silent=True) or {}).get("upload_ids", [])
+    )
+    if not isinstance(upload_ids, list) or not all(isinstance(u, str) for u in upload_ids):
+        return jsonify({"error": "upload_ids must be a list of strings"}), 400
 
     # -------------------------------------------------------
     # 📌 CASE 1: MULTIPLE FILE UPLOAD (correct field = files[])
@@ -51,7 +113,21 @@ def second_opinion():
         filenames.append(file_result["filename"])
 
     # -------------------------------------------------------
-    # 📌 CASE 3: MANUAL TEXT ENTRY
+    # 📌 CASE 3: FINALIZED CHUNKED UPLOADS (see routes/uploads)
+    # -------------------------------------------------------
+    elif upload_ids:
+        for upload_id in upload_ids:
+            try:
+                file_result = get_extraction(upload_id)
+            except UploadError as e:
+                return jsonify({"error": e.message, "upload_id": upload_id}), e.status
+
+            extracted_text += "\n" + file_result["text"]
+            file_paths.append(file_result["file_path"])
+            filenames.append(file_result["filename"])
+
+    # -------------------------------------------------------
+    # 📌 CASE 4: MANUAL TEXT ENTRY
     # -------------------------------------------------------
     else:
         payload = request.get_json() or {}
@@ -77,29 +153,117 @@ def second_opinion():
         disease = entry.get("disease", "").strip()
         entry["recommended_doctors"] = match_doctors_from_dataset(disease)
 
+    # Optional: each doctor's earliest free slots (one query for all conditions)
+    if include_slots:
+        attach_next_slots(
+            [d for entry in ai_result for d in entry["recommended_doctors"]],
+            include_slots
+        )
+
     # -------------------------------------------------------
-    # 💾 TEMP STORE REPORT OBJECT
+    # 💾 STORE REPORT + AI ANALYSIS
     # -------------------------------------------------------
-    report = {
-        "id": next_report_id,
-        "user_name": user_name,
-        "extracted_text": extracted_text,
-        "file_paths": file_paths,  # list of uploaded files
-        "filenames": filenames,
-        "ai_result": ai_result,
-        "final_report": None
-    }
+    report = UserReport(
+        user_id=user_id,
+        user_name=user_name,
+        file_path=file_paths[0] if file_paths else "",
+        file_paths=json.dumps(file_paths),
+        filenames=json.dumps(filenames),
+        extracted_text=extracted_text,
+    )
+    risk_score, risk_category, suggested_specialty = summarize_risk(ai_result)
+    report.ai_analysis = AIAnalysis(
+        risk_score=risk_score,
+        risk_category=risk_category,
+        suggested_specialty=suggested_specialty,
+        full_analysis_json=json.dumps({"conditions": ai_result}),
+    )
 
-    reports.append(report)
-    next_report_id += 1
+    db.session.add(report)
+    db.session.commit()
 
     # -------------------------------------------------------
     # 📤 SEND RESPONSE
     # -------------------------------------------------------
     return jsonify({
         "status": "success",
-        "report_id": report["id"],
+        "report_id": report.id,
         "ai_result": ai_result,
         "file_paths": file_paths,
         "filenames": filenames
     }), 200
+
+
+# -------------------------------------------------------
+# 📚 LIST REPORTS (newest first, keyset paginated)
+#    ?user_id=&before_id=&limit=
+# -------------------------------------------------------
+@second_opinion_bp.route("/second_opinion/reports", methods=["GET"])
+def list_reports():
+    user_id = request.args.get("user_id", type=int)
+    before_id = request.args.get("before_id", type=int)
+    limit = page_limit(request.args, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+    # Never load extracted_text / full_analysis_json for a listing
+    query = (
+        UserReport.query
+        .options(
+            db.load_only(UserReport.id, UserReport.user_id, UserReport.user_name,
+                         UserReport.filenames, UserReport.created_at),
+            db.joinedload(UserReport.ai_analysis).load_only(
+                AIAnalysis.risk_score, AIAnalysis.risk_category, AIAnalysis.suggested_specialty
+            ),
+        )
+        .order_by(UserReport.id.desc())
+    )
+    if user_id is not None:
+        query = query.filter(UserReport.user_id == user_id)
+    if before_id is not None:
+        query = query.filter(UserReport.id < before_id)
+
+    rows = query.limit(limit).all()
+
+    items = []
+    for r in rows:
+        analysis = r.ai_analysis
+        items.append({
+            "id": r.id,
+            "user_id": r.user_id,
+            "user_name": r.user_name,
+            "filenames": json.loads(r.filenames) if r.filenames else [],
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+            "risk_score": analysis.risk_score if analysis else None,
+            "risk_category": analysis.risk_category if analysis else None,
+            "suggested_specialty": analysis.suggested_specialty if analysis else None,
+        })
+
+    return jsonify({
+        "reports": items,
+        "next_before_id": items[-1]["id"] if len(items) == limit else None
+    }), 200
+
+
+# -------------------------------------------------------
+# 📄 SINGLE REPORT WITH FULL TEXT + AI RESULT
+# -------------------------------------------------------
+@second_opinion_bp.route("/second_opinion/<int:report_id>", methods=["GET"])
+def get_report(report_id):
+    report = UserReport.query.get(report_id)
+    if not report:
+        return jsonify({"error": "Report not found"}), 404
+
+    analysis = report.ai_analysis
+    ai_data = json.loads(analysis.full_analysis_json) if analysis else {}
+
+    return jsonify({
+        "id": report.id,
+        "user_id": report.user_id,
+        "user_name": report.user_name,
+        "extracted_text": report.extracted_text,
+        "file_paths": json.loads(report.file_paths) if report.file_paths else [],
+        "filenames": json.loads(report.filenames) if report.filenames else [],
+        "ai_result": ai_data.get("conditions", []),
+        "risk_score": analysis.risk_score if analysis else None,
+        "risk_category": analysis.risk_category if analysis else None,
+        "created_at": report.created_at.isoformat() if report.created_at else None,
+    }), 200
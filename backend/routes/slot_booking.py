@@ -1,17 +1,51 @@
 from flask import Blueprint, request, jsonify
 from core.database import db
 from core.models import Slot, Appointment, Doctor, User, UserReport, AIAnalysis
-from core.notifications import send_notification
-from core.email_service import send_email 
+from core.notifications import send_notification, send_user_email
+from core.booking import claim_slot
+from core.slots import format_slot_range, parse_slot_time, iso, utcnow
+from core.slot_index import get_index
 import json 
 
 slot_bp = Blueprint("slot_bp", __name__)
 
-# ✅ Fetch all available slots for a doctor
-@slot_bp.route("/doctor/<int:doctor_id>/slots", methods=["GET"])
-def get_doctor_slots(doctor_id):
-    slots = Slot.query.filter_by(doctor_id=doctor_id, is_booked=False).all()
-    return jsonify({"slots": [{"id": s.id, "start": s.start, "end": s.end} for s in slots]})
+
+def format_conditions(analysis_data):
+    """Top conditions from a stored analysis, for the doctor's email.
+
+    Reports saved by /second_opinion store {"conditions": [Gemini entries]};
+    older analyses used patient_summary / differential_diagnosis.
+    """
+    if "conditions" in analysis_data:
+        lines = ["Possible Conditions:"]
+        entries = [c for c in analysis_data["conditions"] or [] if isinstance(c, dict)]
+        for i, c in enumerate(entries[:3]):
+            lines.append(f"  {i+1}. {c.get('disease', 'Unknown')} (Risk: {c.get('risk', 'N/A')})")
+    else:
+        lines = [f"- Patient Summary: {analysis_data.get('patient_summary', 'N/A')}", "",
+                 "Differential Diagnosis:"]
+        for i, diag in enumerate(analysis_data.get('differential_diagnosis', [])[:3]):
+            lines.append(f"  {i+1}. {diag['condition']} (Confidence: {diag['confidence_percent']}%)")
+    return "\n    ".join(lines)
+
+# ✅ First free window of ?minutes= (default 30) from ?from= (default now)
+@slot_bp.route("/doctor/<int:doctor_id>/slots/next_free", methods=["GET"])
+def next_free_window(doctor_id):
+    minutes = request.args.get("minutes", 30, type=int)
+    try:
+        after = parse_slot_time(request.args.get("from")) or utcnow()
+    except ValueError:
+        return jsonify({"error": "from must be an ISO datetime"}), 400
+
+    run = get_index(doctor_id).next_free_window(after, minutes)
+    if not run:
+        return jsonify({"window": None}), 200
+
+    return jsonify({"window": {
+        "start": iso(run[0][0]),
+        "end": iso(run[-1][1]),
+        "slot_ids": [slot_id for _, _, slot_id in run]
+    }}), 200
 
 
 # ✅ Book a slot (user chooses slot) - UPDATED TO INCLUDE REPORT & EMAIL
@@ -24,10 +58,6 @@ def book_appointment():
     disease = data.get("disease", "Consultation")
     user_report_id = data.get("user_report_id") # Expecting the ID of the analyzed report
 
-    slot = Slot.query.get(slot_id)
-    if not slot or slot.is_booked:
-        return jsonify({"error": "Slot unavailable"}), 400
-    
     # 1. Fetch relevant records
     # Assumes Doctor model has a relationship to User (doctor.user)
     doctor = Doctor.query.options(db.joinedload(Doctor.user)).get(doctor_id)
@@ -46,22 +76,26 @@ def book_appointment():
          return jsonify({"error": "Doctor email missing, cannot send notification"}), 500
 
 
-    # 2. Create Appointment
+    # 2. Claim the slot atomically; it commits together with the appointment
+    if not claim_slot(slot_id, doctor_id):
+        return jsonify({"error": "Slot unavailable"}), 400
+    slot = Slot.query.get(slot_id)
+
+    # 3. Create Appointment
     new_appt = Appointment(
         doctor_id=doctor_id,
         patient_id=patient_id,
         user_report_id=user_report_id, # Link the report
         disease=disease,
         slot_id=slot_id,
-        slot_time=slot.start, 
         status="requested",
     )
-    slot.is_booked = True
+    new_appt.slot_time = format_slot_range(slot)
     db.session.add(new_appt)
-    db.session.commit()
+    db.session.flush()  # assigns new_appt.id for the email; committed with the outbox row below
 
-    # 3. Prepare and Send Email Notification to Doctor
-    email_subject = f"New Appointment: {patient.name} - {disease} ({slot.start})"
+    # 4. Prepare and Send Email Notification to Doctor
+    email_subject = f"New Appointment: {patient.name} - {disease} ({format_slot_range(slot)})"
     
     email_body = f"""
     Dear Dr. {doctor.user.name},
@@ -69,7 +103,7 @@ def book_appointment():
     You have a new appointment request from {patient.name}.
 
     - Patient: {patient.name}
-    - Time: {slot.start} - {slot.end}
+    - Time: {format_slot_range(slot)}
     - Reason: {disease}
     - Appointment ID: {new_appt.id}
     
@@ -88,12 +122,7 @@ def book_appointment():
     
     - Risk Score: {ai_analysis.risk_score}/100 ({ai_analysis.risk_category})
     - Suggested Specialty: {ai_analysis.suggested_specialty}
-    - Patient Summary: {analysis_data.get('patient_summary', 'N/A')}
-
-    Differential Diagnosis:
-    """
-        for i, diag in enumerate(analysis_data.get('differential_diagnosis', [])[:3]):
-            email_body += f"    {i+1}. {diag['condition']} (Confidence: {diag['confidence_percent']}%) \n"
+    {format_conditions(analysis_data)}"""
             
         email_body += f"""
     
@@ -101,14 +130,16 @@ def book_appointment():
     The full AI analysis is also available on your dashboard.
     """
 
-    send_email(
-        to=doctor.email, 
-        subject=email_subject, 
-        body=email_body, 
+    send_user_email(
+        doctor.user_id,
+        to=doctor.email,
+        subject=email_subject,
+        body=email_body,
         attachment_paths=attachment_paths
     )
+    db.session.commit()
 
-    # 4. Send Notification to Doctor
+    # 5. Send Notification to Doctor
     send_notification(doctor.user_id, f"New appointment request from {patient.name} for {disease}.")
     
     return jsonify({
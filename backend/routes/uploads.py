@@ -0,0 +1,69 @@
+from flask import Blueprint, request, jsonify
+from core.chunked_upload import (
+    UploadError, init_upload, write_chunk, get_upload, finalize_upload
+)
+
+uploads_bp = Blueprint("uploads", __name__)
+
+
+def _public(meta):
+    return {
+        "upload_id": meta["id"],
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "received": meta["received"],
+        "status": meta["status"],
+    }
+
+
+@uploads_bp.errorhandler(UploadError)
+def handle_upload_error(e):
+    return jsonify({"error": e.message}), e.status
+
+
+# ------------------------------------------------
+# 1️⃣ START A CHUNKED UPLOAD
+# ------------------------------------------------
+@uploads_bp.route("/uploads", methods=["POST"])
+def start_upload():
+    data = request.get_json() or {}
+    try:
+        size = int(data.get("size", 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "size must be an integer"}), 400
+
+    meta = init_upload(data.get("filename"), size)
+    return jsonify(_public(meta)), 201
+
+
+# ------------------------------------------------
+# 2️⃣ UPLOAD ONE CHUNK AT A GIVEN OFFSET
+#    Body is the raw chunk bytes (application/octet-stream)
+# ------------------------------------------------
+@uploads_bp.route("/uploads/<upload_id>", methods=["PUT"])
+def upload_chunk(upload_id):
+    offset = request.args.get("offset", type=int)
+    if offset is None:
+        return jsonify({"error": "offset query parameter is required"}), 400
+
+    # Read from the raw stream so the chunk is never buffered whole
+    meta = write_chunk(upload_id, offset, request.stream, request.content_length)
+    return jsonify(_public(meta)), 200
+
+
+# ------------------------------------------------
+# 3️⃣ UPLOAD STATUS (clients resume from "received")
+# ------------------------------------------------
+@uploads_bp.route("/uploads/<upload_id>", methods=["GET"])
+def upload_status(upload_id):
+    return jsonify(_public(get_upload(upload_id))), 200
+
+
+# ------------------------------------------------
+# 4️⃣ FINALIZE → text extraction starts immediately
+#    Pass the upload_id to /api/second_opinion as "upload_ids"
+# ------------------------------------------------
+@uploads_bp.route("/uploads/<upload_id>/finalize", methods=["POST"])
+def finalize(upload_id):
+    meta = finalize_upload(upload_id)
+    return jsonify(_public(meta)), 202
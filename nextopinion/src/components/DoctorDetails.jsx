@@ -37,7 +37,7 @@ export default function DoctorDetails() {
         const docRes = await API.get(`/doctors/${id}`);
         setDoctor(docRes.data);
 
-        const slotRes = await API.get(`/doctor/${id}/slots`);
+        const slotRes = await API.get(`/doctor/${id}/slots`, { params: { free: 1 } });
         setSlots(slotRes.data.slots || []);
       } catch (err) {
         console.error(err);